@@ -6,16 +6,19 @@ It retrieves sensor data and writes it to a log file for later analysis.
 #built-in
 import threading
 import multiprocessing as mp
-import json, time, os, datetime
-
-#embedded stuff
-import board, adafruit_bno055
+import json, time, os, datetime, queue
 
 #files
-from altimeter import MS5611
-from quaternion import quaternion_relative
-from transmit import RYLR998_Transmit
-from camera import start_camera
+#hardware drivers (board, adafruit_bno055, altimeter, transmit) & camera are imported where they're used,
+#the driver imports then overlap with the other devices' bring-up instead of all running before any of it
+from quaternion import ReferenceFrame
+from profiler import make_profiler
+from bringup import Bringup
+from calibration import CalibrationMonitor, calibration_status, load_profile, write_profile, quaternion_valid
+from launch import LaunchDetector, PreTriggerBuffer
+from events import FlightEventDetector, vertical_component
+from downlink import DownlinkScheduler
+from acquisition import ChannelSchedule, MultiRateSampler
 
 import logging, logging_config
 
@@ -26,35 +29,121 @@ data_collection_sleep_timer = 0.01
 
 altimeter_read_update_timer = 0.05
 
+#Hz each sensor channel is read at, the last reading is held (and logged) in between.
+#the quaternion is read every cycle of log_flight_data, None also means every cycle (or every altimeter update)
+imu_channel_rates = {
+    "linearAcceleration": None, #launch & burnout detection
+    "radialVelocity": 50.0,
+    "euler": 10.0, #redundant with the quaternion, kept for the log
+    "gravity": 10.0,
+    "magnetic": 10.0,
+    "temperature": 1.0,
+}
+altimeter_channel_rates = {
+    "temperature": 1.0, #MS5611 D2 conversion, pressure is compensated with the held one in between
+}
+
+#seconds each device gets to come up in setup_hardware before it counts as failed
+radio_setup_timeout = 5.0
+gyroscope_setup_timeout = 3.0
+altimeter_setup_timeout = 3.0
+
+#BNO055 offsets & radii, saved once fully calibrated on the pad and written back on every boot
+calibration_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "calibration", "bno055.json")
+
+#launch detection, on the pad only every pad_decimation-th sample is written & transmitted,
+#the last pretrigger_seconds at full rate are kept in memory and flushed to the log on launch
+launch_accel_threshold = 25.0 #m/s^2 of linear acceleration (gravity removed), ~2.5g
+launch_accel_hold = 0.05 #seconds it has to stay above the threshold
+launch_climb_threshold = 15.0 #m/s barometric climb rate
+pretrigger_seconds = 5.0
+pad_decimation = 10
+
+#seconds between sensor health frames queued for the downlink (calibration status is an extra I2C read),
+#downlink.DOWNLINK_POLICY decides how often each kind actually goes on the air
+health_update_timer = 1.0
+
+#per-stage timing of the sampling loop, summary to the log every profile_dump_interval seconds & at shutdown
+profile_stages = False
+profile_dump_interval = 10.0
+
 #global scope dynamic variables (inter-thread comms)
 pressure, temperature, altitude = 0, 0, 0
 
 class FlightDataLogger:
     def __init__(self):
+        self.profiler = make_profiler(
+            ["i2c_quat", "relative", "i2c_other", "json", "detect", "write", "queue"],
+            enabled=profile_stages,
+            dump_interval=profile_dump_interval,
+        )
+
         print("Setting up measurement devices")
-        self.setup_hardware()
+        self.hardware_report = self.setup_hardware()
+
+        self.sample_period = data_collection_sleep_timer #"rate" control commands change it mid-flight
 
         self.transmit_queue = mp.Queue()
-        self.transmit_process = mp.Process(target=self._transmit_process, args=(self.transmit_queue,))
+        self.command_queue = mp.Queue() #control commands the transmit process picked up, applied by the sampling loop
+        self.transmit_process = mp.Process(target=self._transmit_process, args=(self.transmit_queue, self.command_queue))
         self.transmit_process.start()
 
+        #started after the fork so the transmit process doesn't inherit a thread mid-I2C, stopped when logging starts
+        self.calibration_monitor = CalibrationMonitor(self.gyroscope, calibration_file, since=self.gyroscope_ready)
+        self.calibration_monitor.start()
+
         self.flight_package = {
             "gyro": {},  # Dictionary to hold gyroscope data
             "altimeter": {"temperature": -1, "pressure": -1, "altitude": -1},  # Dictionary to hold altimeter data
             "time": -1,  # Time elapsed since the start of data collection
         }
         
-    def setup_hardware(self) -> list:
-        
-        #radio
-        self.radio = RYLR998_Transmit()
-        
-        #gyroscope
-        self.i2c = board.I2C()  # Initializes the I2C interface for communication with the sensor
-        self.gyroscope = adafruit_bno055.BNO055_I2C(self.i2c)
-        
+    def setup_hardware(self) -> dict:
+        """
+        Brings every device up in parallel (see bringup.py), returns the per-device readiness & timing report
+        """
+        bringup = Bringup()
+
+        bringup.add("radio", self.setup_radio, timeout=radio_setup_timeout)
+        bringup.add("i2c", self.setup_i2c, timeout=1.0) # Initializes the I2C interface for communication with the sensor
+        bringup.add("gyroscope", self.setup_gyroscope, depends=["i2c"], timeout=gyroscope_setup_timeout)
+        bringup.add("altimeter", self.setup_altimeter, timeout=altimeter_setup_timeout)
+
+        devices = bringup.run()
+        bringup.log()
+
+        if bringup.failed():
+            raise RuntimeError(f"Hardware failed to come up: {', '.join(bringup.failed())}")
+
+        self.radio = devices["radio"]
+        self.i2c = devices["i2c"]
+        self.gyroscope = devices["gyroscope"]
+        self.altimeter = devices["altimeter"]
+
         self.gyro_last_temperature_reading = 0xFFFF # This variable holds the last temperature reading to prevent erroneous readings
 
+        report = bringup.report()
+        report["gyroscope"]["calibration_restored"] = self.calibration_restored
+        return report
+
+    def setup_radio(self):
+        from transmit import RYLR998_Transmit
+        return RYLR998_Transmit()
+
+    def setup_i2c(self):
+        import board
+        return board.I2C()
+
+    def setup_gyroscope(self, i2c):
+        import adafruit_bno055
+        gyroscope = adafruit_bno055.BNO055_I2C(i2c)
+
+        #start fusion from the last full calibration instead of from scratch
+        profile = load_profile(calibration_file)
+        if profile is not None:
+            write_profile(gyroscope, profile)
+        self.calibration_restored = profile is not None
+
         """
         (x:0x00, y:0x01, z:0x02, x_sign, y-sign, z_sign)
         the x and y variables must be remapped in order to match the orientation of the rocket
@@ -62,28 +151,76 @@ class FlightDataLogger:
 
         remap = (0x00, 0x02, 0x01, 0, 0, 0)
         
-        self.gyroscope.axis_remap = remap #calls setter decorator to reinitialize values
+        gyroscope.axis_remap = remap #calls setter decorator to reinitialize values
         time.sleep(0.05) #needs about 30-50ms to kick-in
-        
-        #altimeter
+
+        self.gyroscope_ready = time.monotonic()
+        return gyroscope
+
+    def setup_altimeter(self):
+        from altimeter import MS5611
+
         cs_pin = 22
         clock_pin = 11
         data_in_pin = 9
         data_out_pin = 10
 
-        self.altimeter = MS5611(cs_pin, clock_pin, data_in_pin, data_out_pin, update_sleep_timer=0.05)
-        
-    def _transmit_process(self, qbuff: mp.Queue):
-        while True:
-            payload = qbuff.get() #will wait the process until an item is available to get
-
-            time_delta, quaternion = payload
+        return MS5611(cs_pin, clock_pin, data_in_pin, data_out_pin, update_sleep_timer=0.05)
 
-            self.radio.send(time_delta, quaternion)
+    def _transmit_process(self, qbuff: mp.Queue, command_queue: mp.Queue):
+        scheduler = DownlinkScheduler() #priority & rate per frame kind, see downlink.py
 
-    def transmit(self, time_delta, quaternion):
+        while True:
+            #waits on the queue until there's something new or a pending frame comes off its rate limit
+            try:
+                scheduler.push(*qbuff.get(timeout=scheduler.wait_time(time.monotonic())))
+                while not qbuff.empty():
+                    scheduler.push(*qbuff.get_nowait())
+            except queue.Empty:
+                pass
+
+            frame = scheduler.pop(time.monotonic())
+
+            if frame:
+                kind, payload = frame
+                if kind == "health":
+                    payload[1]["dropped"] = scheduler.dropped
+
+                try:
+                    self.radio.send_frame(kind, payload)
+                except RuntimeError as e:
+                    print(f"Failed to send {kind} frame: {e}", flush=True)
+
+            #this process owns the serial port once logging starts, so it picks up (and acks) in-flight commands too
+            command = self.radio.read_command(block=False)
+            if command:
+                command_queue.put(command)
+
+    def apply_commands(self, quaternion):
+        """
+        Runs control commands forwarded by the transmit process, quaternion is this cycle's raw (un-zeroed) reading
+        """
+        while not self.command_queue.empty():
+            command, argument = self.command_queue.get_nowait()
+
+            try:
+                if command == "rezero":
+                    self.reference_frame.rezero(quaternion)
+                elif command == "rate": #finite & clamped by RYLR998_Transmit.read_command, see reyax.check_control
+                    self.sample_period = 1 / float(argument)
+            except (TypeError, ValueError, ZeroDivisionError) as e:
+                logging.error(f"Couldn't apply {command} command ({argument}): {e}")
+                continue
+
+            logging.info(f"Applied {command} command ({argument})")
+            print(f"Applied {command} command ({argument})", flush=True)
+
+    def transmit(self, kind: str, payload):
+        """
+        Queues a frame for the transmit process, see RYLR998_Transmit.send_frame for each kind's payload
+        """
         try:
-            self.transmit_queue.put((time_delta, quaternion))
+            self.transmit_queue.put((kind, payload))
         except Exception as e:
             print(f"ran into error trying to transmit: {e}", flush=True)
             logging.error(f"ran into error trying to transmit: {e}")
@@ -93,18 +230,31 @@ class FlightDataLogger:
         return response #sea_level_pressure
 
     def start_altimeter_thread(self):
+        schedule = ChannelSchedule(altimeter_channel_rates)
+
         def update_altimeter_vals():
                 while True:
                     self.flight_package["altimeter"]["temperature"] = float(self.altimeter.returnTemperature()) * (9/5) + 32
                     self.flight_package["altimeter"]["pressure"] = self.altimeter.returnPressure()
                     self.flight_package["altimeter"]["altitude"] = self.altimeter.returnAltitude()
 
-                    self.altimeter.update()
+                    now = time.monotonic()
+                    refresh_temperature = schedule.due("temperature", now)
+                    self.altimeter.update(temperature=refresh_temperature)
+                    if refresh_temperature:
+                        schedule.mark("temperature", now)
+
                     time.sleep(altimeter_read_update_timer)
         
         self.altimeter_thread = threading.Thread(target=update_altimeter_vals, daemon=True)
         self.altimeter_thread.start()
 
+    def get_calibration_status(self) -> dict:
+        """
+        {"system", "gyro", "accel", "mag"} 0 (uncalibrated) - 3 (fully calibrated) & "calibrated"
+        """
+        return calibration_status(self.gyroscope)
+
     def get_temperature(self):
         result = self.gyroscope.temperature  # Get the current temperature from the sensor
 
@@ -133,55 +283,122 @@ class FlightDataLogger:
         
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
 
-        #used to measure time delta
-        start_payload_time = time.time() 
+        self.calibration_monitor.stop() #profile reads halt fusion, none of that once we're logging
+
         self.start_time = time.time()
 
         #at this point, we have a reference quaternion for the zeroed gyroscope; post start signal
         #we will use this to calculate the relative quaternion for each data collection
         while True: 
             self.reference_quaternion = self.gyroscope.quaternion
-            if not all(self.reference_quaternion): 
+            if not quaternion_valid(self.reference_quaternion): 
                 time.sleep(0.1)
             else:
                 break
 
+        self.reference_frame = ReferenceFrame(self.reference_quaternion) #inverse computed once, rezero() to re-zero
+        self.flight_package["gyro"]["calibration"] = self.get_calibration_status() #as of the start signal
+
         # open(file_path, "w").close() 
 
+        from camera import start_camera
         start_camera(dir_path) #Popen's a subprocess for recording data, t=0 ~ self.start_time
 
         self.start_altimeter_thread()
 
-        while True:  # Main loop for continuous data collection
-            with open(file_path, "a") as file: #open & close for each iteration to avoid corruption as best as possible
-                    
-                # Calculate the time elapsed since the start
-                self.flight_package["time"] = time.time() - self.start_time
+        event_detector = FlightEventDetector(LaunchDetector(launch_accel_threshold, launch_accel_hold, launch_climb_threshold))
+        pretrigger = PreTriggerBuffer(pretrigger_seconds, pad_decimation)
+        last_health = None
 
-                # Collect sensor data and store in the flight package
-                
-                self.flight_package["gyro"]["quaternion"] = quaternion_relative(*self.reference_quaternion, *list(self.gyroscope.quaternion))
-                self.flight_package["gyro"]["euler"] = list(self.gyroscope.euler) #doesn't account for "zeroing" mechanism
-                
-                if len([x for x in [*self.flight_package["gyro"]["quaternion"], *self.flight_package["gyro"]["euler"]] if x is None]):
-                    continue #NoneType encountered in readloop
-                
-                self.flight_package["gyro"]["linearAcceleration"] = list(self.gyroscope.linear_acceleration)
-                self.flight_package["gyro"]["radialVelocity"] = list(self.gyroscope.gyro)
-                self.flight_package["gyro"]["magnetic"] = list(self.gyroscope.magnetic)
-                self.flight_package["gyro"]["gravity"] = list(self.gyroscope.gravity)
-                self.flight_package["gyro"]["temperature"] = self.get_temperature()
-
-                # Write the flight package as JSON to the log file
-                json_data = json.dumps(self.flight_package) + ",\n\n"
-                
-                file.write(json_data)  # Append the JSON data to the log file
-                            
-                self.transmit(time_delta = (time.time()) - start_payload_time, quaternion = self.flight_package["gyro"]["quaternion"])
+        gyroscope = self.gyroscope
+        sampler = MultiRateSampler({
+            "euler": lambda: list(gyroscope.euler), #doesn't account for "zeroing" mechanism
+            "linearAcceleration": lambda: list(gyroscope.linear_acceleration),
+            "radialVelocity": lambda: list(gyroscope.gyro),
+            "magnetic": lambda: list(gyroscope.magnetic),
+            "gravity": lambda: list(gyroscope.gravity),
+            "temperature": self.get_temperature,
+        }, imu_channel_rates)
 
-                time.sleep(data_collection_sleep_timer)
+        while True:  # Main loop for continuous data collection
+            cycle_start = self.profiler.start()
                 
-                start_payload_time = time.time()
+            # Calculate the time elapsed since the start
+            self.flight_package["time"] = time.time() - self.start_time
+
+            # Collect sensor data and store in the flight package
+            
+            quaternion = self.gyroscope.quaternion
+            t = self.profiler.lap("i2c_quat", cycle_start)
+
+            self.flight_package["gyro"]["quaternion"] = self.reference_frame.relative(quaternion)
+            t = self.profiler.lap("relative", t)
+
+            #only the channels that are due get read, the rest hold their last reading (see imu_channel_rates)
+            self.flight_package["gyro"].update(sampler.sample(self.flight_package["time"]))
+            self.flight_package["sampled"] = sampler.sampled #mission time each held value was actually read
+            t = self.profiler.lap("i2c_other", t)
+            
+            if len([x for x in [*self.flight_package["gyro"]["quaternion"], *self.flight_package["gyro"]["euler"]] if x is None]):
+                continue #NoneType encountered in readloop
+
+            json_data = json.dumps(self.flight_package) + ",\n\n"
+            t = self.profiler.lap("json", t)
+
+            was_launched = event_detector.launched
+            events = event_detector.update(
+                self.flight_package["time"],
+                self.flight_package["gyro"]["linearAcceleration"],
+                self.flight_package["gyro"]["gravity"],
+                self.flight_package["altimeter"]["altitude"],
+            )
+
+            if was_launched:
+                lines = [json_data]
+            elif event_detector.launched:
+                lines = pretrigger.drain() + [json_data] #full-rate lead-up to ignition first
+                logging.info(f"LAUNCH DETECTED by {event_detector.launch_detector.reason}, flushed {len(lines)} buffered samples")
+            elif pretrigger.push(self.flight_package["time"], json_data):
+                lines = [json_data] #decimated pad stream
+            else:
+                lines = []
+
+            for event in events: #tagged into the log right after the sample that completed it
+                lines.append(json.dumps({"event": event}) + ",\n\n")
+                self.transmit("event", event) #outranks everything else on the downlink
+
+                logging.info(f"EVENT {event}")
+                print(f"EVENT {event['event'].upper()} at {event['time']:.3f} s, altitude {event['altitude']}", flush=True)
+            t = self.profiler.lap("detect", t)
+
+            if lines:
+                with open(file_path, "a") as file: #open & close for each write to avoid corruption as best as possible
+                    file.write("".join(lines))  # Append the JSON data to the log file
+                t = self.profiler.lap("write", t)
+
+                mission_time = self.flight_package["time"]
+                gyro = self.flight_package["gyro"]
+
+                self.transmit("attitude", (mission_time, gyro["quaternion"]))
+                self.transmit("altitude", (
+                    mission_time,
+                    self.flight_package["altimeter"]["altitude"],
+                    event_detector.velocity,
+                    vertical_component(gyro["linearAcceleration"], gyro["gravity"]),
+                ))
+
+                if last_health is None or mission_time - last_health >= health_update_timer:
+                    health = {"calibration": self.get_calibration_status(), "temperature": gyro["temperature"], "rate": 1 / self.sample_period}
+                    self.transmit("health", (mission_time, health))
+                    last_health = mission_time
+
+                self.profiler.lap("queue", t)
+
+            self.apply_commands(quaternion)
+
+            self.profiler.end_cycle(cycle_start) #rate & jitter, dumps to the log every profile_dump_interval
+
+            time.sleep(self.sample_period)
 
 if __name__ == "__main__":
     logger = FlightDataLogger()  # Create an instance of FlightDataLogger
@@ -197,4 +414,6 @@ if __name__ == "__main__":
         logger.log_flight_data(sea_level_pressure)  # Start logging flight data & begin sub process for transmission 
     except Exception as e: #TODO redundant restart
         print(f"Logging Failed, Error: {e}\nexiting...")
-        logging.error(f"Logging Failed, Error: {e}\nexiting...")
\ No newline at end of file
+        logging.error(f"Logging Failed, Error: {e}\nexiting...")
+    finally:
+        logger.profiler.dump() #final stage timing summary, no-op unless profile_stages
\ No newline at end of file
@@ -2,56 +2,83 @@ from hashlib import sha256
 from pprint import pprint
 from dotenv import load_dotenv
 import os
-import threading
-from queue import Queue
 from interpolation import Interpolate
-from time import sleep
+from time import sleep, perf_counter
 
-from flask import Flask, render_template
+from flask import Flask, render_template, request, jsonify, Response, abort
 from flask_socketio import SocketIO, emit
 from flask_cors import CORS
 
-from recieve import RYLR998_Recieve
+from ingest import RadioIngest
+from broadcast import ClientFanout
+from meshcache import load_mesh
+from history import pack_frames
+from vehicles import VehicleRegistry, DEFAULT_VEHICLE, vehicle_room, parse_address
+from recorder import TelemetryReader
+from timeseries import TimeSeries
+import gzip, datetime
 
 FPS = 30
 
+#how interpolated frames reach the browser
+#   "batch"    : one binary "data_batch" message per radio packet, paced by the client's jitter buffer
+#   "timeline" : "data_send" at FPS on a fixed clock, each frame sampled from the packet timeline at its render time
+#   "frames"   : "data_send" per interpolated frame, paced by sleeps (original behaviour)
+EMIT_MODE = "batch"
+TIMELINE_DELAY = 0.15 #seconds the timeline renders behind the newest packet, so there's usually a packet on both sides
+TIMELINE_METHOD = "squad" #"slerp" or "squad", how the timeline is sampled between packets
+
+#every decoded packet is appended here by the ingest process (see recorder.py), one recording per server run
+RECORDING_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "groundLogs",
+    datetime.date.today().strftime('%m-%d-%Y'), f"telemetry-{datetime.datetime.now().strftime('%H%M%S')}.bin",
+)
+recording = TelemetryReader(RECORDING_PATH)
+series = TimeSeries(recording) #decimated & cached chart data off the recording
+
 load_dotenv(os.getcwd() + "/.env")
 hashedPassword = os.environ.get("hashedPassword")
 
 launchSequenceInitiated = False
 isBroadcasting = False  # Tracks if data is currently being broadcasted
 
-# Shared queue & radio for communication between threads while reducing proc overhead
-data_queue, radio, interpolator = None, None, None
+# Radio ingest process handle shared between socket handlers and the emitter task
+radio = None
 
-def get_data_queue(): #lazy load
-    global data_queue
+meshes = {} #model name -> (source_hash, gzipped binary mesh)
 
-    if data_queue is None:
-        data_queue = Queue()
-    
-    return data_queue
+#interpolator, history, link stats, events & latest frames of every transmitter heard, by <Address>
+vehicles = VehicleRegistry(lambda: Interpolate(FPS, TIMELINE_METHOD))
+start_acks = {} #address -> the last start command's ack result, replayed to dashboards opened after it came back
+LINK_STATS_PERIOD = 1.0 #seconds between "link_stats" pushes to the dashboard
 
 def get_radio(): #lazy load
     global radio
 
     if radio is None:
-        radio = RYLR998_Recieve()
+        radio = RadioIngest(RECORDING_PATH) #serial polling, decoding & recording run in their own process, see ingest.py
     
     return radio
 
-def get_interpolation_medium(): #lazy load
-    global interpolator
-    if interpolator is None:
-        interpolator = Interpolate(FPS)
-    
-    return interpolator
+def get_mesh(name: str): #lazy load, compiled once per source hash & cached on disk
+    if name not in meshes:
+        model_dir = os.path.join(app.root_path, "static", "model")
+        obj_path = os.path.join(model_dir, f"{name}.obj")
+
+        if not os.path.exists(obj_path):
+            return None
+
+        meshes[name] = load_mesh(obj_path, os.path.join(model_dir, "cache"))
+
+    return meshes[name]
 
 app = Flask(__name__)
 
 CORS(app) #for the singulate JS http request on the frontend for downloading the model of the rocket
 socketio = SocketIO(app, cors_allowed_origins="*") #inappropriate, but we don't have a domain or internet access so it's fine FTMP
 
+fanout = ClientFanout(socketio, default_room=vehicle_room(DEFAULT_VEHICLE)) #per-client bounded queues, a slow browser only slows itself down
+
 # ROUTES
 @app.route("/")
 def index():
@@ -64,7 +91,150 @@ def index():
 def visualize():
     return render_template("visualize.html")
 
+@app.route("/model/<name>.rkm")
+def mesh(name):
+    """
+    Precompiled binary mesh (see meshcache.py), gzipped with a strong ETag of the source hash & encoding
+    """
+    mesh = get_mesh(name)
+    if mesh is None:
+        abort(404)
+
+    mesh_hash, compressed = mesh
+
+    gzipped = "gzip" in request.accept_encodings
+    etag = f"{mesh_hash}-gz" if gzipped else mesh_hash #strong ETags differ between representations
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif gzipped:
+        response = Response(compressed, mimetype="application/octet-stream")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(gzip.decompress(compressed), mimetype="application/octet-stream")
+
+    response.set_etag(etag)
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "no-cache" #always revalidate, the ETag makes it a 304
+    return response
+
+@app.route("/history")
+def history_since():
+    """
+    Catch-up for late-joining dashboards: GET /history?since=<stream seconds>&max_points=<n>&vehicle=<address>
+    Float32 [t, w, x, y, z] per sample, decimated to at most max_points
+    """
+    since = request.args.get("since", -1.0, type=float)
+    max_points = request.args.get("max_points", 2000, type=int)
+
+    address = parse_address(request.args.get("vehicle"))
+    if address is None:
+        abort(400)
+
+    vehicle = vehicles.find(address)
+    if vehicle is None: #not heard from (yet)
+        abort(404)
+
+    return Response(vehicle.history.pack_since(since, max_points), mimetype="application/octet-stream")
+
+@app.route("/recording")
+def recording_range():
+    """
+    Recorded packets by mission time: GET /recording?start=<s>&end=<s>&kinds=attitude,altitude&vehicle=<address>
+    every bound & filter is optional, see TelemetryReader.range for the record fields
+    """
+    start = request.args.get("start", None, type=float)
+    end = request.args.get("end", None, type=float)
+    kinds = request.args.get("kinds", None)
+
+    address = parse_address(request.args.get("vehicle"), None) #None: every vehicle
+    if address is None and "vehicle" in request.args:
+        abort(400)
+
+    return jsonify(recording.range(start, end, kinds.split(",") if kinds else None, address))
+
+@app.route("/series/<channel>")
+def series_range(channel):
+    """
+    One channel for charts: GET /series/<channel>?start=<s>&end=<s>&points=<n>&vehicle=<address>
+    [[mission time, value], ...] LTTB-decimated to at most points, see timeseries.CHANNELS
+    """
+    start = request.args.get("start", None, type=float)
+    end = request.args.get("end", None, type=float)
+    points = max(2, min(request.args.get("points", 500, type=int), 10000))
+
+    address = parse_address(request.args.get("vehicle"))
+    if address is None:
+        abort(400)
+
+    result = series.get(channel, start, end, points, address)
+    if result is None:
+        abort(404)
+
+    return jsonify(result)
+
+@app.route("/metrics/link")
+def link_metrics():
+    """
+    Radio link quality per vehicle address, same payload as the "link_stats" socket event
+    """
+    return jsonify({vehicle.address: vehicle.link_stats.snapshot() for vehicle in vehicles.all()})
+
+@app.route("/metrics/clients")
+def client_metrics():
+    """
+    Per-client queue depth, lag, drop & downsampling stats
+    """
+    return jsonify(fanout.metrics())
+
 # SOCKET-IO EVENTS
+@socketio.on("connect")
+def handle_connect():
+    fanout.add_client(request.sid)
+
+@socketio.on("disconnect")
+def handle_disconnect():
+    fanout.remove_client(request.sid)
+
+@socketio.on("select_vehicle")
+def handle_select_vehicle(data):
+    """
+    Switches the client to another transmitter's room, it should request_history for that vehicle next.
+    The room can be one not heard from yet, the client starts getting its packets once it is.
+    """
+    address = parse_address((data or {}).get("vehicle"))
+    if address is None:
+        return
+
+    fanout.join(request.sid, vehicle_room(address))
+    emit("vehicle_selected", {"vehicle": address})
+
+@socketio.on("request_history")
+def handle_request_history(data):
+    """
+    Socket.IO flavour of /history, answered only to the requesting client, empty for a vehicle not heard from yet
+    """
+    data = data or {}
+    since = float(data.get("since", -1.0))
+    max_points = int(data.get("max_points", 2000))
+    address = parse_address(data.get("vehicle"))
+    vehicle = vehicles.find(address)
+
+    if address in start_acks: #the rocket is started (and acks) before there's any packet, or any dashboard
+        emit("start_ack", start_acks[address])
+
+    if vehicle is None:
+        emit("history_batch", b"")
+        emit("flight_events", [])
+        emit("vehicles", vehicles.addresses())
+        return
+
+    emit("history_batch", vehicle.history.pack_since(since, max_points))
+    emit("flight_events", vehicle.flight_events)
+    for kind, frame in vehicle.latest_frames.items():
+        emit(kind, frame)
+    emit("vehicles", vehicles.addresses())
+
 @socketio.on("check_password")
 def checkPass(data):
     """
@@ -85,19 +255,38 @@ def checkPass(data):
         sleep(0.01) #race condition if emits before flag checks, the one request_data socket flag will NEVER send
 
         emit("validation_result", {"success": True})
-        # Begin data collection & provide sea_level_pressure
-        radio.send_start_command(float(data.get("sea_level_pressure", 101.7)))
+        # Begin data collection & provide sea_level_pressure, acked once the rocket is logging
+        #published to everyone, this client is already off to /visualize by the time the ack comes back
+        start_acks[DEFAULT_VEHICLE] = radio.send_start_command(float(data.get("sea_level_pressure", 101.7)), DEFAULT_VEHICLE)
+        fanout.publish("start_ack", start_acks[DEFAULT_VEHICLE])
 
     else:
         emit("validation_result", {"success": False})
 
+@socketio.on("control_command")
+def controlCommand(data):
+    """
+    In-flight control messages ("rezero" or "rate" with {"argument": hz}) to {"vehicle": address},
+    only once the launch sequence is running
+    """
+    data = data or {}
+    command = data.get("command")
+    address = parse_address(data.get("vehicle"))
+
+    if not launchSequenceInitiated or command not in ("rezero", "rate") or address is None:
+        emit("control_result", {"command": command, "acked": False, "status": "rejected"})
+        return
+
+    emit("control_result", radio.send_control(command, data.get("argument"), address))
+
 @socketio.on("request_data")
 def handle_request_data(_):
     """
     Initiates data handling only once during execution, ensuring proper coordination between threads
-    Emits quaternions 1 by 1 to EVERY client in the root namespace
+    Emits quaternions to EVERY client in the root namespace through each client's fanout channel
+    Returns immediately, packets are handled by the send_data background task as the ingest process delivers them
     """
-    global launchSequenceInitiated, isBroadcasting, data_queue
+    global launchSequenceInitiated, isBroadcasting
 
     if not launchSequenceInitiated:
         return
@@ -108,65 +297,149 @@ def handle_request_data(_):
 
     isBroadcasting = True  # Mark broadcasting as active
 
-    data_queue = get_data_queue()
+    socketio.start_background_task(send_data)
 
-    send_thread = threading.Thread(target=send_data)
-    send_thread.start()
-    
-    read_data()
+    if EMIT_MODE == "timeline":
+        socketio.start_background_task(render_timeline)
 
-def read_data():
+def send_data():
     """
-    Thread to read data from the radio and add it to the queue.
+    Background task to emit packets from the ingest process to the clients.
+    Packets are demultiplexed by sender address, each vehicle's go through its own interpolator & history
+    and out to its own fanout room.
     """
-    global radio, launchSequenceInitiated, data_queue
 
-    if data_queue is None:
-        data_queue = get_data_queue()
+    global launchSequenceInitiated, radio
+
+    radio = get_radio()
 
     while launchSequenceInitiated:
-        data = radio.recieve()  # this returns a serializable dictionary
-        
-        if data:
-            data_queue.put(data)
+        data = radio.recieve(timeout=0.1) #blocks on the ingest pipe, this returns a serializable dictionary
 
-def send_data():
+        if not data:
+            continue
+
+        link = data["link"] if isinstance(data, dict) else data[-1] #see read_decoded_data
+        address = DEFAULT_VEHICLE if link.get("address") is None else link["address"]
+        known = vehicles.find(address) is not None
+        vehicle = vehicles.get(address) #packets are the only thing that creates vehicles
+
+        if not known: #dashboards list the vehicles they can switch to
+            fanout.publish("vehicles", vehicles.addresses())
+            print(f"New vehicle at address {vehicle.address}", flush=True)
+
+        if link.get("epoch", 0) != vehicle.epoch: #flight computer rebooted, see reyax.MissionClock
+            vehicles.restart(vehicle, link["epoch"])
+            print(f"Vehicle {vehicle.address} restarted, epoch {vehicle.epoch}", flush=True)
+
+        if isinstance(data, dict): #typed frame other than attitude, dispatched on its kind, see read_decoded_data
+            frame = {key: value for key, value in data.items() if key not in ("frame", "link")}
+            series.invalidate(data["frame"], data["time"], vehicle.address) #already in the recording, see ingest.py
+
+            if data["frame"] == "event":
+                if not any(event["event"] == frame["event"] and event["time"] == frame["time"] for event in vehicle.flight_events): #sent EVENT_REPEATS times
+                    vehicle.flight_events.append(frame)
+                    fanout.publish("flight_event", frame, room=vehicle.room)
+                    print(f"Flight event from {vehicle.address}: {frame}", flush=True)
+            else: #"altitude" or "health"
+                vehicle.latest_frames[data["frame"]] = frame
+                fanout.publish(data["frame"], frame, room=vehicle.room)
+            continue
+
+        vehicle.link_stats.record(data[0], link)
+
+        if perf_counter() - vehicle.last_link_push > LINK_STATS_PERIOD:
+            fanout.publish("link_stats", vehicle.link_stats.snapshot(), room=vehicle.room)
+            vehicle.last_link_push = perf_counter()
+
+        #frames lost before this one, backfilled from its redundant copies, go in first
+        samples = link.get("recovered", []) + [(data[0], data[1])]
+
+        for mission_time, _ in samples:
+            series.invalidate("attitude", mission_time, vehicle.address)
+
+        interpolator = vehicle.interpolator
+
+        if EMIT_MODE == "timeline":
+            for mission_time, quaternion in samples:
+                if interpolator.add_sample(mission_time, quaternion):
+                    vehicle.history.append(mission_time, interpolator.lastquaternion)
+
+            continue
+
+        if EMIT_MODE == "batch":
+            #the client's jitter buffer paces playback, no need to sleep between frames
+            timed_frames = []
+            for mission_time, quaternion in samples:
+                packet_frames = interpolator.interpolate_timed(mission_time, quaternion)
+
+                if packet_frames:
+                    vehicle.history.append(*packet_frames[-1]) #the packet itself is the last frame
+                    timed_frames.extend(packet_frames)
+
+            if timed_frames:
+                fanout.publish("data_batch", pack_frames(timed_frames), room=vehicle.room) #send data to every client watching this vehicle
+                print(f"Sent {len(timed_frames)} frames!", flush=True)
+
+            continue
+
+        #[0]mission_time, [1]only one quaternion type==dict
+        time_delta = 0.0 if vehicle.last_mission_time is None else max(0.0, data[0] - vehicle.last_mission_time)
+        vehicle.last_mission_time = data[0]
+
+        all_interpolated = interpolator.interpolate_quaternion(time_delta, data[1]) 
+
+        if type(all_interpolated[0]) == float: #1d [], first iter
+            fanout.publish("data_send", all_interpolated, room=vehicle.room) #send data to every client watching this vehicle
+            
+            print("Sent!", flush=True)
+            
+            sleep(0.01) #works well, in future add PID loop
+            continue
+
+        for interpolated_quaternion in all_interpolated:
+
+            if not isinstance(interpolated_quaternion, list): #if is np.array, make list
+                interpolated_quaternion = interpolated_quaternion.tolist()
+
+            fanout.publish("data_send", interpolated_quaternion, room=vehicle.room) #[w, x, y, z] #send data to every client watching this vehicle
+            print("Sent!", flush=True)
+            sleep(0.01) #works well, in future add PID loop
+
+def render_timeline():
     """
-    Thread to emit data from the queue to the client.
+    Background task for EMIT_MODE "timeline": emits one frame per 1/FPS tick, scheduled against absolute deadlines
+    so sleep overshoot never accumulates, and only computes the frames it actually sends.
+    Every vehicle is sampled on its own stream clock, into its own room.
     """
+    global launchSequenceInitiated
 
-    global launchSequenceInitiated, data_queue, interpolator
-
-    data_queue = get_data_queue()
-    interpolator = get_interpolation_medium()
+    frame_period = 1 / FPS
+    next_frame = perf_counter()
 
     while launchSequenceInitiated:
-        if not data_queue.empty():
-            data = data_queue.get()
-
-            #[0]time_delta, [1]only one quaternion type==dict
-            all_interpolated = interpolator.interpolate_quaternion(data[0], data[1]) 
-
-            if type(all_interpolated[0]) == float: #1d [], first iter
-                socketio.emit("data_send", all_interpolated) #send data to ALL connected clients
-                
-                print(f"Sent! Left in queue {data_queue.qsize()}", flush=True)
-                
-                sleep(0.01) #works well, in future add PID loop
+        for vehicle in vehicles.all():
+            latest = vehicle.interpolator.timeline.latest_time()
+
+            if latest is None:
                 continue
 
-            for interpolated_quaternion in all_interpolated:
+            now = perf_counter()
 
-                if not isinstance(interpolated_quaternion, list): #if is np.array, make list
-                    interpolated_quaternion = interpolated_quaternion.tolist()
+            #(re)anchor on the first packet, after running out of packets, or when falling too far behind
+            if vehicle.clock_offset is None or not (latest - 4 * TIMELINE_DELAY <= now - vehicle.clock_offset <= latest + TIMELINE_DELAY):
+                vehicle.clock_offset = now - latest + TIMELINE_DELAY
 
-                socketio.emit("data_send", interpolated_quaternion) #[w, x, y, z] #send data to ALL connected clients
-                print(f"Sent! Left in queue {data_queue.qsize()}", flush=True)
-                sleep(0.01) #works well, in future add PID loop
+            fanout.publish("data_send", vehicle.interpolator.sample(now - vehicle.clock_offset), room=vehicle.room) #[w, x, y, z]
+
+        next_frame += frame_period
+        delay = next_frame - perf_counter()
+
+        if delay > 0:
+            sleep(delay)
+        else: #overran a whole frame, drop it rather than bursting to catch up
+            next_frame = perf_counter()
 
-        else:
-            # Small sleep to avoid busy-waiting
-            sleep(0.01)
-            
 if __name__ == "__main__":
+    get_mesh("rocket_edited") #compile before the first browser asks for it
     socketio.run(app, host="0.0.0.0", debug=True, allow_unsafe_werkzeug=True)
\ No newline at end of file
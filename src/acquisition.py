@@ -0,0 +1,61 @@
+"""
+Multi-rate sensor acquisition: every channel is read at its own rate and its last value held in between,
+so slow-changing channels (magnetometer, gravity, temperature) stop costing a bus transaction every cycle.
+
+    sampler = MultiRateSampler({"magnetic": lambda: list(bno.magnetic), ...}, {"magnetic": 10.0})
+    values = sampler.sample(t) #{channel: newest value}, only the channels that were due were read
+
+A rate of None (or a channel left out of rates) reads on every call. A reading with a None in it isn't held,
+the channel is read again on the next call.
+"""
+
+class ChannelSchedule:
+    def __init__(self, rates: dict):
+        self.rates = dict(rates) #channel -> Hz, None for every call
+        self.next_due = {} #channel -> t of its next read
+
+    def due(self, channel: str, t: float) -> bool:
+        next_due = self.next_due.get(channel)
+        return next_due is None or t >= next_due
+
+    def mark(self, channel: str, t: float):
+        """
+        Records a read at t, the next one is a period on from the last due time so the rate doesn't drift
+        """
+        rate = self.rates.get(channel)
+        if not rate:
+            return
+
+        period = 1.0 / rate
+        next_due = self.next_due.get(channel)
+
+        if next_due is None or t - next_due >= period: #first read, or fell a whole period behind
+            self.next_due[channel] = t + period
+        else:
+            self.next_due[channel] = next_due + period
+
+class MultiRateSampler:
+    def __init__(self, channels: dict, rates: dict):
+        self.channels = channels #channel -> no-argument reader
+        self.schedule = ChannelSchedule(rates)
+
+        self.values = {} #channel -> last value read, held until the next read
+        self.sampled = {} #channel -> t of that read
+        self.reads = {channel: 0 for channel in channels}
+
+    def sample(self, t: float) -> dict:
+        for channel, reader in self.channels.items():
+            if not self.schedule.due(channel, t):
+                continue
+
+            value = reader()
+            self.values[channel] = value
+            self.reads[channel] += 1
+
+            if value is None or (isinstance(value, list) and None in value): #retried next call
+                continue
+
+            self.sampled[channel] = t
+            self.schedule.mark(channel, t)
+
+        return self.values
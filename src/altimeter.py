@@ -1,6 +1,5 @@
 import RPi.GPIO as GPIO
 import time
-import numpy
 
 class MS5611(object):
     
@@ -83,8 +82,7 @@ class MS5611(object):
 
         # Load compensation parameters
         print("reading coeffs")
-        self._read_coefficients()
-        time.sleep(1.0)
+        self._read_coefficients() #PROM is loaded by the reset above, nothing more to wait on
         
         # Updating data                
         self.update()   
@@ -176,14 +174,19 @@ class MS5611(object):
     def _readTemperature(self):
         self.D2 = self._read_adc()
         
-    def update(self):
+    def update(self, temperature: bool = True):
+        """
+        temperature=False skips the D2 conversion and compensates with the last one, temperature drifts
+        far slower than pressure so it only needs refreshing every so often
+        """
         self._refreshPressure()
         time.sleep(self.update_sleep_timer / 2)
         self._readPressure()
         
-        self._refreshTemperature()
-        time.sleep(self.update_sleep_timer / 2)
-        self._readTemperature()
+        if temperature:
+            self._refreshTemperature()
+            time.sleep(self.update_sleep_timer / 2)
+            self._readTemperature()
         
         self.calculatePressureAndTemperature()
 
@@ -230,5 +233,5 @@ class MS5611(object):
         if not self.ground_pressure:
             self.ground_pressure = self.PRES
         
-        altitude = 44330 * (1.0 - numpy.power(self.PRES / self.ground_pressure, 0.1903))
+        altitude = 44330 * (1.0 - (self.PRES / self.ground_pressure) ** 0.1903)
         return altitude
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""
+Brings the flight computer's devices up in parallel, each as soon as the devices it depends on are ready,
+so pad-to-ready time is the slowest chain of devices instead of the sum of all of them.
+
+    bringup = Bringup()
+    bringup.add("i2c", board.I2C, timeout=1.0)
+    bringup.add("gyroscope", setup_gyroscope, depends=["i2c"], timeout=3.0) #called with the i2c device
+    devices = bringup.run() #{name: device} of everything that came up
+    print(bringup.summary())
+
+A device whose init raises or overruns its timeout counts as failed, everything depending on it is skipped.
+An overrunning init can't be killed, its thread is a daemon and whatever it returns later is ignored.
+"""
+
+import logging, threading, time
+
+class Device:
+    def __init__(self, name: str, init, depends: list, timeout: float, changed: threading.Event):
+        self.name = name
+        self.init = init
+        self.depends = list(depends)
+        self.timeout = timeout
+
+        self.state = "pending" #pending -> running -> ready | failed | timeout | skipped
+        self.result = None
+        self.error = None
+        self.started = None #perf_counter when init was called
+        self.finished = None
+
+        self.done = threading.Event()
+        self.changed = changed #shared with every other device, wakes Bringup.run's watchdog
+        self.lock = threading.Lock()
+
+    def finish(self, state: str, result=None, error=None) -> bool:
+        """
+        First finish wins, a timed out init that returns later doesn't get to change the outcome
+        """
+        with self.lock:
+            if self.done.is_set():
+                return False
+
+            self.state = state
+            self.result = result
+            self.error = error
+            self.finished = time.perf_counter()
+            self.done.set()
+            self.changed.set()
+            return True
+
+class Bringup:
+    def __init__(self):
+        self.devices = {} #insertion order is a valid start order, dependencies must be added first
+        self.changed = threading.Event() #set whenever a device starts or finishes
+        self.run_start = None
+
+    def add(self, name: str, init, depends: list = (), timeout: float = 5.0):
+        """
+        init is called with the results of depends, in order, and returns the device
+        """
+        for dependency in depends:
+            if dependency not in self.devices:
+                raise ValueError(f"{name} depends on {dependency}, which hasn't been added")
+
+        self.devices[name] = Device(name, init, depends, timeout, self.changed)
+
+    def _bring_up(self, device: Device):
+        dependencies = [self.devices[name] for name in device.depends]
+
+        for dependency in dependencies:
+            dependency.done.wait()
+
+        failed = [dependency.name for dependency in dependencies if dependency.state != "ready"]
+        if failed:
+            device.finish("skipped", error=f"waiting on {', '.join(failed)}")
+            return
+
+        device.started = time.perf_counter()
+        device.state = "running"
+        self.changed.set()
+
+        try:
+            result = device.init(*[dependency.result for dependency in dependencies])
+        except Exception as e:
+            device.finish("failed", error=repr(e))
+            return
+
+        device.finish("ready", result=result)
+
+    def run(self) -> dict:
+        """
+        Starts every device at once (each waits on its own dependencies) and watches them until all have settled,
+        failing any whose init runs past its timeout. Returns {name: device} of the ready ones.
+        """
+        self.run_start = time.perf_counter()
+
+        for device in self.devices.values():
+            threading.Thread(target=self._bring_up, args=(device,), name=f"bringup-{device.name}", daemon=True).start()
+
+        while True:
+            self.changed.clear()
+            now = time.perf_counter()
+
+            running = [device for device in self.devices.values() if not device.done.is_set()]
+            if not running:
+                break
+
+            next_deadline = None
+            for device in running:
+                if device.started is None: #still waiting on its dependencies
+                    continue
+
+                deadline = device.started + device.timeout
+                if now >= deadline:
+                    device.finish("timeout", error=f"not ready after {device.timeout}s")
+                elif next_deadline is None or deadline < next_deadline:
+                    next_deadline = deadline
+
+            self.changed.wait(None if next_deadline is None else next_deadline - now)
+
+        return {name: device.result for name, device in self.devices.items() if device.state == "ready"}
+
+    def failed(self) -> list:
+        return [name for name, device in self.devices.items() if device.state != "ready"]
+
+    def report(self) -> dict:
+        """
+        {name: {"state", "started" (s after run), "elapsed" (s in init), "error"}, "total": s}
+        """
+        report = {}
+        end = self.run_start
+
+        for name, device in self.devices.items():
+            report[name] = {
+                "state": device.state,
+                "started": None if device.started is None else round(device.started - self.run_start, 4),
+                "elapsed": None if device.started is None or device.finished is None else round(device.finished - device.started, 4),
+                "error": device.error,
+            }
+            if device.finished is not None:
+                end = max(end, device.finished)
+
+        report["total"] = round(end - self.run_start, 4)
+        return report
+
+    def summary(self) -> str:
+        report = self.report()
+        lines = [f"hardware ready in {report.pop('total'):.3f} s"]
+
+        for name, device in report.items():
+            timing = f"started {device['started']:.3f} s, took {device['elapsed']:.3f} s" if device["elapsed"] is not None else "-"
+            error = f" | {device['error']}" if device["error"] else ""
+            lines.append(f"{name:>10}: {device['state']:<8} {timing}{error}")
+
+        return "\n".join(lines)
+
+    def log(self):
+        summary = self.summary()
+        logging.info(f"HARDWARE BRINGUP\n{summary}")
+        print(f"HARDWARE BRINGUP\n{summary}", flush=True)
@@ -0,0 +1,166 @@
+import threading, time
+from collections import deque
+
+#lag thresholds (seconds) between publish and the client acking it, see ClientChannel._send_loop
+LAG_HIGH = 0.25 #above this, halve the client's message rate
+LAG_LOW = 0.05 #below this, double it back towards full rate
+
+MAX_STRIDE = 8 #slowest a client can get is 1 out of every MAX_STRIDE messages
+ACK_TIMEOUT = 2.0 #a client that never acks (or is gone) still gets its next message after this
+
+STREAM_EVENTS = ("data_send", "data_batch") #attitude stream, the only events downsampled or dropped for a slow client
+
+class ClientChannel:
+    """
+    Bounded outbound queue & sender thread for a single Socket.IO client.
+    When the queue is full the OLDEST message is dropped (latest-wins), so the producer never waits on a slow client.
+    Only STREAM_EVENTS go through that queue & the stride; everything else (flight events, acks, altitude, health,
+    the vehicle list) is one-shot, goes in an unbounded queue that's always sent first, and is never dropped.
+
+    socketio.emit only hands a message to engine.io's unbounded per-socket queue, so the channel keeps one message
+    in flight and waits for the client's ack before sending the next; a slow browser backs up this queue instead.
+    """
+    def __init__(self, socketio, sid: str, maxlen: int = 16, room: str = None):
+        self.socketio = socketio
+        self.sid = sid
+        self.room = room #only gets room-addressed messages for this room, see ClientFanout.publish
+
+        self.queue = deque(maxlen=maxlen) #(event, payload, enqueued_at) of STREAM_EVENTS
+        self.reliable = deque() #(event, payload, enqueued_at) of everything else
+        self.condition = threading.Condition()
+        self.connected = True
+        self.delivered = threading.Event() #set by the client's ack of the message in flight
+
+        #metrics
+        self.stride = 1 #send every stride-th published stream message
+        self.published = 0
+        self.streamed = 0 #published STREAM_EVENTS, what the stride counts
+        self.sent = 0
+        self.dropped = 0 #overwritten in the queue before being sent
+        self.skipped = 0 #filtered out by the stride
+        self.unacked = 0 #not acked within ACK_TIMEOUT
+        self.lag = 0.0 #seconds between publish and ack of the last sent message
+
+        self.thread = threading.Thread(target=self._send_loop, daemon=True)
+        self.thread.start()
+
+    def put(self, event: str, payload):
+        with self.condition:
+            self.published += 1
+
+            if event not in STREAM_EVENTS:
+                self.reliable.append((event, payload, time.perf_counter()))
+                self.condition.notify()
+                return
+
+            self.streamed += 1
+            if self.streamed % self.stride:
+                self.skipped += 1
+                return
+
+            if len(self.queue) == self.queue.maxlen:
+                self.dropped += 1
+
+            self.queue.append((event, payload, time.perf_counter()))
+            self.condition.notify()
+
+    def close(self):
+        with self.condition:
+            self.connected = False
+            self.condition.notify()
+        self.delivered.set()
+
+    def _adapt(self):
+        """
+        Adaptive downsampling, lag is only ever measured on messages that made it to the client (or timed out)
+        """
+        if self.lag > LAG_HIGH and self.stride < MAX_STRIDE:
+            self.stride *= 2
+        elif self.lag < LAG_LOW and self.stride > 1:
+            self.stride //= 2
+
+    def _send_loop(self):
+        while True:
+            with self.condition:
+                while self.connected and not self.reliable and not self.queue:
+                    self.condition.wait()
+
+                if not self.connected:
+                    return
+
+                event, payload, enqueued_at = (self.reliable or self.queue).popleft()
+
+            delivered = self.delivered = threading.Event() #fresh per message, a late ack can't count for the next one
+            self.socketio.emit(event, payload, to=self.sid, callback=lambda *args: delivered.set())
+            acked = delivered.wait(ACK_TIMEOUT) #only blocks this client's thread
+
+            with self.condition:
+                self.sent += 1
+                self.unacked += not acked
+                self.lag = time.perf_counter() - enqueued_at
+                self._adapt()
+
+    def metrics(self) -> dict:
+        with self.condition:
+            return {
+                "queued": len(self.queue) + len(self.reliable),
+                "published": self.published,
+                "sent": self.sent,
+                "dropped": self.dropped,
+                "skipped": self.skipped,
+                "unacked": self.unacked,
+                "stride": self.stride,
+                "lag_ms": round(self.lag * 1000, 2),
+                "room": self.room,
+            }
+
+class ClientFanout:
+    """
+    Replaces socketio.emit broadcasts: publish() hands each message to every connected client's own channel,
+    or only to the clients in one room. Every client is in exactly one room, default_room until it joins another.
+    """
+    def __init__(self, socketio, maxlen: int = 16, default_room: str = None):
+        self.socketio = socketio
+        self.maxlen = maxlen
+        self.default_room = default_room
+        self.channels = {} #sid -> ClientChannel
+        self.lock = threading.Lock()
+
+    def add_client(self, sid: str):
+        with self.lock:
+            if sid not in self.channels:
+                self.channels[sid] = ClientChannel(self.socketio, sid, self.maxlen, self.default_room)
+
+    def join(self, sid: str, room: str):
+        """
+        Moves the client to room, it stops getting the old room's messages right away (anything already queued still goes)
+        """
+        with self.lock:
+            channel = self.channels.get(sid)
+
+        if channel is not None:
+            with channel.condition:
+                channel.room = room
+
+    def remove_client(self, sid: str):
+        with self.lock:
+            channel = self.channels.pop(sid, None)
+
+        if channel is not None:
+            channel.close()
+
+    def publish(self, event: str, payload, room: str = None):
+        """
+        room None goes to every client
+        """
+        with self.lock:
+            channels = [channel for channel in self.channels.values() if room is None or channel.room == room]
+
+        for channel in channels:
+            channel.put(event, payload)
+
+    def metrics(self) -> dict:
+        with self.lock:
+            channels = dict(self.channels)
+
+        return {sid: channel.metrics() for sid, channel in channels.items()}
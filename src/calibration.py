@@ -0,0 +1,151 @@
+"""
+Saves the BNO055's calibration profile (sensor offsets & radii) once it's fully calibrated and writes it back on boot,
+so the fusion algorithm starts from the last good calibration instead of from scratch.
+
+Reading or writing a profile drops the sensor into CONFIG mode, which halts fusion, so it only happens on the pad:
+write_profile in setup_hardware, CalibrationMonitor while waiting on the start signal, stopped before logging starts.
+"""
+
+import json, logging, os, threading, time
+
+CONFIG_MODE = 0x00 #adafruit_bno055.CONFIG_MODE
+
+PROFILE_FIELDS = (
+    "offsets_accelerometer",
+    "offsets_magnetometer",
+    "offsets_gyroscope",
+    "radius_accelerometer",
+    "radius_magnetometer",
+)
+
+def quaternion_valid(quaternion) -> bool:
+    """
+    NDOF reads all zeros (not None) until fusion settles. A settled reading is unit length, though any single
+    component can be exactly 0 (identity, level attitudes), so only the norm is checked.
+    """
+    if quaternion is None or None in quaternion:
+        return False
+    return sum(component * component for component in quaternion) > 0.25 #norm > 0.5
+
+def calibration_status(gyroscope) -> dict:
+    """
+    0 (uncalibrated) - 3 (fully calibrated) for the fusion system & each sensor
+    """
+    system, gyro, accel, mag = gyroscope.calibration_status
+    return {
+        "system": system,
+        "gyro": gyro,
+        "accel": accel,
+        "mag": mag,
+        "calibrated": system == gyro == accel == mag == 3,
+    }
+
+def read_profile(gyroscope) -> dict:
+    last_mode = gyroscope.mode
+    gyroscope.mode = CONFIG_MODE #once for every field, otherwise each read switches modes on its own
+
+    try:
+        profile = {}
+        for field in PROFILE_FIELDS:
+            value = getattr(gyroscope, field)
+            profile[field] = list(value) if isinstance(value, tuple) else value
+        return profile
+    finally:
+        gyroscope.mode = last_mode
+
+def write_profile(gyroscope, profile: dict):
+    last_mode = gyroscope.mode
+    gyroscope.mode = CONFIG_MODE
+
+    try:
+        for field in PROFILE_FIELDS:
+            value = profile[field]
+            setattr(gyroscope, field, tuple(value) if isinstance(value, list) else value)
+    finally:
+        gyroscope.mode = last_mode
+
+def save_profile(profile: dict, path: str):
+    """
+    Written to a temporary file & renamed over the old one, a brownout mid-write can't leave a half profile behind
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    temporary = path + ".tmp"
+    with open(temporary, "w") as file:
+        json.dump({"saved": time.time(), **profile}, file)
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(temporary, path)
+
+def load_profile(path: str):
+    """
+    The saved profile, None if there isn't a usable one
+    """
+    try:
+        with open(path) as file:
+            profile = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if not all(field in profile for field in PROFILE_FIELDS):
+        return None
+
+    return profile
+
+class CalibrationMonitor:
+    """
+    Background thread for the pad: tracks calibration status, when the quaternion first became valid,
+    and saves the profile the first time the sensor reports full calibration
+    """
+    def __init__(self, gyroscope, path: str, since: float, poll_interval: float = 1.0):
+        self.gyroscope = gyroscope
+        self.path = path
+        self.since = since #time.monotonic() the sensor came up, for quaternion_valid_after
+        self.poll_interval = poll_interval
+
+        self.status = None
+        self.saved = False
+        self.quaternion_valid_after = None #seconds from since to the first valid quaternion
+
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Blocks until the thread is out of any I2C access, call before the sampling loop touches the sensor
+        """
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.poll()
+            except OSError as e: #I2C hiccup, try again next poll
+                logging.error(f"Calibration poll failed: {e}")
+
+            self.stop_event.wait(self.poll_interval)
+
+    def poll(self):
+        if self.quaternion_valid_after is None and quaternion_valid(self.gyroscope.quaternion):
+            self.quaternion_valid_after = time.monotonic() - self.since
+            logging.info(f"BNO055 quaternion valid {self.quaternion_valid_after:.1f} s after power-up")
+            print(f"BNO055 quaternion valid {self.quaternion_valid_after:.1f} s after power-up", flush=True)
+
+        status = calibration_status(self.gyroscope)
+        if status != self.status:
+            logging.info(f"BNO055 calibration {status}")
+            print(f"BNO055 calibration {status}", flush=True)
+        self.status = status
+
+        if status["calibrated"] and not self.saved:
+            save_profile(read_profile(self.gyroscope), self.path)
+            self.saved = True
+            logging.info(f"BNO055 calibration profile saved to {self.path}")
+            print(f"BNO055 calibration profile saved to {self.path}", flush=True)
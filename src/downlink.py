@@ -0,0 +1,101 @@
+"""
+Decides which typed frame (see reyax FRAME_KINDS) goes on the air next from the flight computer.
+
+Every AT+SEND holds the radio for the frame's airtime, so there's only so many frames a second; the scheduler
+spends them by priority. A kind is eligible once its pending frame is in and 1/rate seconds have passed since
+it last went out, the most urgent eligible kind is sent first:
+
+    event     priority 0, no rate limit, every event EVENT_REPEATS times, nothing is ever superseded
+    altitude  priority 1, 5 Hz
+    health    priority 2, 0.5 Hz
+    attitude  priority 3, no rate limit, fills whatever airtime is left
+
+Rate limits on the urgent kinds are what keep them from starving attitude. Routine kinds only keep their newest
+frame, a frame that's superseded before it went out is counted in `dropped` instead of backing the queue up.
+
+    scheduler = DownlinkScheduler()
+    scheduler.push("attitude", (mission_time, quaternion))
+    kind, payload = scheduler.pop(time.monotonic()) #None if nothing is eligible yet
+"""
+
+from collections import deque
+from reyax import EVENT_REPEATS
+
+class FramePolicy:
+    def __init__(self, priority: int, rate: float = None, latest_only: bool = True, repeats: int = 1):
+        self.priority = priority #lower goes first
+        self.rate = rate #Hz cap, None for as often as there's airtime
+        self.latest_only = latest_only #a newer frame replaces a pending one
+        self.repeats = repeats #times each frame goes out
+
+    @property
+    def interval(self) -> float:
+        return 0.0 if not self.rate else 1.0 / self.rate
+
+DOWNLINK_POLICY = {
+    "event": FramePolicy(0, latest_only=False, repeats=EVENT_REPEATS),
+    "altitude": FramePolicy(1, rate=5.0),
+    "health": FramePolicy(2, rate=0.5),
+    "attitude": FramePolicy(3),
+}
+
+class DownlinkScheduler:
+    def __init__(self, policy: dict = None):
+        self.policy = DOWNLINK_POLICY if policy is None else policy
+        self.order = sorted(self.policy, key=lambda kind: self.policy[kind].priority)
+
+        self.pending = {kind: deque() for kind in self.policy} #[payload, sends left]
+        self.last_sent = {kind: None for kind in self.policy} #time.monotonic() of the last send
+        self.sent = {kind: 0 for kind in self.policy}
+        self.dropped = 0 #frames superseded before they went out
+
+    def push(self, kind: str, payload):
+        policy = self.policy[kind]
+        queue = self.pending[kind]
+
+        if policy.latest_only and queue:
+            self.dropped += len(queue)
+            queue.clear()
+
+        queue.append([payload, policy.repeats])
+
+    def eligible_at(self, kind: str) -> float:
+        """
+        time.monotonic() the kind's rate limit allows its next send, None if it has nothing pending
+        """
+        if not self.pending[kind]:
+            return None
+
+        last_sent = self.last_sent[kind]
+        return 0.0 if last_sent is None else last_sent + self.policy[kind].interval
+
+    def pop(self, now: float):
+        """
+        (kind, payload) to send now, None if nothing is pending or everything pending is rate limited
+        """
+        for kind in self.order:
+            eligible_at = self.eligible_at(kind)
+            if eligible_at is None or eligible_at > now:
+                continue
+
+            queue = self.pending[kind]
+            entry = queue[0]
+            entry[1] -= 1
+            if entry[1] <= 0:
+                queue.popleft()
+
+            self.last_sent[kind] = now
+            self.sent[kind] += 1
+            return kind, entry[0]
+
+        return None
+
+    def wait_time(self, now: float):
+        """
+        Seconds until pop has something, 0 if it does right now, None if nothing is pending
+        """
+        times = [eligible_at for eligible_at in map(self.eligible_at, self.order) if eligible_at is not None]
+        if not times:
+            return None
+
+        return max(0.0, min(times) - now)
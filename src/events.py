@@ -0,0 +1,148 @@
+"""
+Streaming flight event detection, O(1) per sample:
+
+    pad --launch--> boost --burnout--> coast --apogee--> descent --landing--> landed
+
+launch:  LaunchDetector (acceleration or barometric climb, see launch.py)
+burnout: vertical linear acceleration turns negative (thrust gone, drag & gravity win) for burnout_hold seconds
+apogee:  smoothed barometric vertical velocity <= 0 once altitude is apogee_drop meters below the highest seen,
+         stamped at the time of that highest reading
+landing: barometric altitude within landing_range meters (max - min) over the last landing_hold seconds;
+         a windowed range instead of the differentiated velocity, which barometer noise keeps above any small threshold
+
+Each event comes back once, as {"event", "time", "altitude", "velocity"}.
+"""
+
+from collections import deque
+from launch import LaunchDetector
+
+PHASES = ("pad", "boost", "coast", "descent", "landed")
+
+class FlightEventDetector:
+    def __init__(self, launch_detector: LaunchDetector, burnout_hold: float = 0.1, apogee_drop: float = 2.0,
+                 landing_range: float = 2.5, landing_hold: float = 5.0, velocity_smoothing: float = 0.3):
+        self.launch_detector = launch_detector
+        self.burnout_hold = burnout_hold
+        self.apogee_drop = apogee_drop
+        self.landing_range = landing_range
+        self.landing_hold = landing_hold
+        self.velocity_smoothing = velocity_smoothing #EMA weight of each new barometer rate
+
+        self.phase = "pad"
+        self.events = []
+
+        #barometric vertical velocity from distinct altitude readings
+        self.last_altitude = None
+        self.last_altitude_time = None
+        self.velocity = 0.0
+
+        self.max_altitude = None
+        self.max_altitude_time = None
+
+        self.burnout_since = None
+
+        #sliding min & max of the descent's altitude over landing_hold, monotonic deques of (time, altitude)
+        self.landing_window_since = None #when the window started filling (descent began)
+        self.window_min = deque()
+        self.window_max = deque()
+
+    @property
+    def launched(self) -> bool:
+        return self.phase != "pad"
+
+    def _event(self, name: str, t: float, altitude) -> dict:
+        event = {"event": name, "time": round(t, 3), "altitude": altitude, "velocity": round(self.velocity, 2)}
+        self.events.append(event)
+        return event
+
+    def _update_velocity(self, t: float, altitude):
+        if not isinstance(altitude, (int, float)):
+            return
+
+        if altitude == self.last_altitude:
+            #a second without a new reading means it's really not moving (on the ground), not just between readings
+            if t - self.last_altitude_time >= 1.0:
+                self.velocity = 0.0
+                self.last_altitude_time = t
+            return
+
+        if self.last_altitude is not None and t > self.last_altitude_time:
+            rate = (altitude - self.last_altitude) / (t - self.last_altitude_time)
+            self.velocity += self.velocity_smoothing * (rate - self.velocity)
+
+        self.last_altitude, self.last_altitude_time = altitude, t
+
+        if self.max_altitude is None or altitude > self.max_altitude:
+            self.max_altitude, self.max_altitude_time = altitude, t
+
+    def update(self, t: float, linear_acceleration, gravity, altitude) -> list:
+        """
+        Feeds one sample, returns the events it completed (almost always none)
+        """
+        self._update_velocity(t, altitude)
+        events = []
+
+        if self.phase == "pad":
+            if self.launch_detector.update(t, linear_acceleration, altitude):
+                self.phase = "boost"
+                events.append(self._event("launch", self.launch_detector.launch_time, altitude))
+                self.max_altitude, self.max_altitude_time = self.last_altitude, t #apogee only counts what's after launch
+
+        elif self.phase == "boost":
+            vertical = vertical_component(linear_acceleration, gravity)
+
+            if vertical is not None and vertical < 0:
+                if self.burnout_since is None:
+                    self.burnout_since = t
+                if t - self.burnout_since >= self.burnout_hold:
+                    self.phase = "coast"
+                    events.append(self._event("burnout", self.burnout_since, altitude))
+            else:
+                self.burnout_since = None
+
+        #apogee is checked during boost too, a missed burnout shouldn't cost us apogee
+        if self.phase in ("boost", "coast") and self.max_altitude is not None and self.last_altitude is not None:
+            if self.velocity <= 0 and self.max_altitude - self.last_altitude >= self.apogee_drop:
+                self.phase = "descent"
+                events.append(self._event("apogee", self.max_altitude_time, self.max_altitude))
+
+        elif self.phase == "descent" and isinstance(altitude, (int, float)):
+            if self._altitude_range(t, altitude) < self.landing_range and t - self.landing_window_since >= self.landing_hold:
+                self.phase = "landed"
+                events.append(self._event("landing", t - self.landing_hold, altitude))
+
+        return events
+
+    def _altitude_range(self, t: float, altitude: float) -> float:
+        """
+        Max - min altitude over the last landing_hold seconds including this reading, amortized O(1)
+        """
+        if self.landing_window_since is None:
+            self.landing_window_since = t
+
+        while self.window_min and self.window_min[-1][1] >= altitude:
+            self.window_min.pop()
+        self.window_min.append((t, altitude))
+
+        while self.window_max and self.window_max[-1][1] <= altitude:
+            self.window_max.pop()
+        self.window_max.append((t, altitude))
+
+        for window in (self.window_min, self.window_max):
+            while t - window[0][0] > self.landing_hold:
+                window.popleft()
+
+        return self.window_max[0][1] - self.window_min[0][1]
+
+def vertical_component(vector, gravity):
+    """
+    Component of vector along "up", BNO055's gravity vector reads +9.8 upwards at rest; None on missing data
+    """
+    if vector is None or gravity is None or None in vector or None in gravity:
+        return None
+
+    norm = (gravity[0] ** 2 + gravity[1] ** 2 + gravity[2] ** 2) ** 0.5
+    if norm == 0:
+        return None
+
+    return (vector[0] * gravity[0] + vector[1] * gravity[1] + vector[2] * gravity[2]) / norm
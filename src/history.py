@@ -0,0 +1,82 @@
+import threading, struct
+
+def pack_frames(timed_frames: list) -> bytes:
+    """
+    Packs [(timestamp, [w, x, y, z]), ...] into a little-endian Float32 block of 5 floats per frame,
+    read on the client with new Float32Array(buffer)
+    """
+    flat = []
+    for timestamp, quaternion in timed_frames:
+        flat.append(timestamp)
+        flat.extend(quaternion)
+
+    return struct.pack(f"<{len(flat)}f", *flat)
+
+class TelemetryHistory:
+    """
+    Bounded ring buffer of received packets, (stream_time, [w, x, y, z]) ordered by stream_time.
+    Lets dashboards that connect late (or reconnect after a Wi-Fi blip) rebuild the flight so far in one response.
+    """
+    def __init__(self, capacity: int = 65536):
+        self.capacity = capacity
+
+        #preallocated, oldest sample lives at self.start
+        self.times = [0.0] * capacity
+        self.samples = [None] * capacity
+        self.start = 0
+        self.count = 0
+
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def append(self, stream_time: float, sample: list):
+        with self.lock:
+            index = (self.start + self.count) % self.capacity
+
+            self.times[index] = stream_time
+            self.samples[index] = sample
+
+            if self.count < self.capacity:
+                self.count += 1
+            else: #full, overwrite the oldest
+                self.start = (self.start + 1) % self.capacity
+
+    def _bisect_right(self, stream_time: float) -> int:
+        """
+        Logical index of the first sample strictly after stream_time, O(log n)
+        """
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self.times[(self.start + mid) % self.capacity] <= stream_time:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def since(self, stream_time: float, max_points: int = 2000) -> list:
+        """
+        Returns [(stream_time, sample), ...] for every sample after stream_time, evenly decimated down to max_points.
+        The newest sample is always included so the client ends up on the current attitude.
+        """
+        with self.lock:
+            first = self._bisect_right(stream_time)
+            available = self.count - first
+
+            if available <= 0:
+                return []
+
+            stride = max(1, -(-available // max(1, max_points))) #ceil division
+            logical = list(range(first, self.count, stride))
+            if logical[-1] != self.count - 1:
+                logical[-1] = self.count - 1
+
+            return [(self.times[(self.start + i) % self.capacity], self.samples[(self.start + i) % self.capacity]) for i in logical]
+
+    def pack_since(self, stream_time: float, max_points: int = 2000) -> bytes:
+        """
+        since() as a little-endian Float32 block of [t, w, x, y, z] per sample, same layout as "data_batch"
+        """
+        return pack_frames(self.since(stream_time, max_points))
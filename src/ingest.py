@@ -0,0 +1,147 @@
+"""
+Runs the RYLR998 receiver in its own process so serial polling & packet decoding never compete with
+Flask, Socket.IO and the interpolator for the web process's GIL.
+
+    ingest process --(data pipe)----> web process : decoded packets
+    web process <--(control pipe)--> ingest process : control commands & their ack results
+
+With a record_path, every decoded packet is also appended to a recording (recorder.py) before it's piped on.
+Live telemetry never depends on the recording: if the disk fails (full, SD fault, USB drive pulled), recording is
+switched off and packets keep flowing to the dashboard.
+"""
+
+import multiprocessing as mp
+import threading, time
+from collections import deque
+
+POLL_TIMEOUT = 0.05 #seconds the ingest process waits on the radio before checking for control messages
+PENDING_PACKETS = 4096 #decoded packets held in the web process until recieve() takes them, oldest dropped beyond
+
+def _open_recorder(record_path):
+    from recorder import TelemetryRecorder
+
+    try:
+        return TelemetryRecorder(record_path)
+    except OSError as e:
+        print(f"Couldn't open recording {record_path}, not recording: {e}", flush=True)
+        return None
+
+def _stop_recording(recorder, reason):
+    print(f"Recording failed, no longer recording (live telemetry continues): {reason}", flush=True)
+    try:
+        recorder.close()
+    except Exception: #the disk is what failed, closing probably will too
+        pass
+
+def _ingest_process(data_conn, control_conn, record_path):
+    from recieve import RYLR998_Recieve #the serial port is opened in the process that uses it
+
+    radio = RYLR998_Recieve()
+    recorder = None if record_path is None else _open_recorder(record_path)
+    control_conn.send(("ready", None))
+
+    while True:
+        while control_conn.poll():
+            command, argument = control_conn.recv()
+
+            if command == "control":
+                control_conn.send(("control", radio.send_control(*argument)))
+            elif command == "stop":
+                radio.RYLR998.close()
+                if recorder is not None:
+                    try:
+                        recorder.close()
+                    except OSError as e:
+                        print(f"Couldn't close recording: {e}", flush=True)
+                return
+
+        data = radio.recieve(timeout=POLL_TIMEOUT)
+
+        if data:
+            if recorder is not None:
+                try:
+                    recorder.record(data)
+                except OSError as e: #the disk
+                    _stop_recording(recorder, e)
+                    recorder = None
+                except Exception as e: #a packet the recorder can't encode, skip just that one
+                    print(f"Couldn't record packet: {e}", flush=True)
+            data_conn.send(data)
+
+class RadioIngest:
+    """
+    Web-process handle on the ingest process, same send_control, send_start_command & recieve interface as RYLR998_Recieve
+
+    A thread empties the data pipe from the moment the process starts, whether or not anything calls recieve() yet:
+    a full pipe would block the ingest loop in send() and with it the control pipe (send_start_command would hang).
+    """
+    def __init__(self, record_path: str = None):
+        data_recv, data_send = mp.Pipe(duplex=False)
+        self.control_conn, child_control_conn = mp.Pipe()
+        self.data_conn = data_recv
+
+        self.control_lock = threading.Lock() #one request/response on the control pipe at a time
+
+        self.packets = deque(maxlen=PENDING_PACKETS)
+        self.packets_ready = threading.Condition()
+        self.dropped = 0 #packets pushed out of self.packets before anything took them
+
+        self.process = mp.Process(target=_ingest_process, args=(data_send, child_control_conn, record_path), daemon=True)
+        self.process.start()
+
+        data_send.close() #only the child writes packets
+        child_control_conn.close()
+
+        threading.Thread(target=self._drain, daemon=True).start()
+
+    def _drain(self):
+        while True:
+            try:
+                data = self.data_conn.recv()
+            except (EOFError, OSError): #ingest process is gone
+                return
+
+            with self.packets_ready:
+                if len(self.packets) == self.packets.maxlen:
+                    self.dropped += 1
+                self.packets.append(data)
+                self.packets_ready.notify()
+
+    def _request(self, command: str, argument=None):
+        with self.control_lock:
+            self.control_conn.send((command, argument))
+
+            while True:
+                reply, result = self.control_conn.recv()
+                if reply == command:
+                    return result
+
+    def send_control(self, command: str, argument=None, RPI02W_address: int = 1) -> dict:
+        """
+        Forwards to RYLR998_Recieve.send_control in the ingest process and returns its ack result
+        """
+        return self._request("control", (command, argument, RPI02W_address))
+
+    def send_start_command(self, pressure: float, RPI02W_address: int = 1) -> dict:
+        return self.send_control("start", pressure, RPI02W_address)
+
+    def recieve(self, timeout: float = None):
+        """
+        Next decoded packet, waits until one arrives, None on timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self.packets_ready:
+            while not self.packets:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self.packets_ready.wait(remaining)
+
+            return self.packets.popleft()
+
+    def close(self):
+        with self.control_lock:
+            self.control_conn.send(("stop", None))
+
+        self.process.join(timeout=1)
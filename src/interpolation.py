@@ -1,10 +1,150 @@
 import numpy as np
+import threading
+from bisect import bisect_right
 from math import acos, sin, cos
 
+import quaternion_batch as qb
+
+SQUAD_MAX_ANGLE = np.radians(60.0) #neighbouring samples further apart than this get SLERP segments, see QuaternionSpline
+
+class QuaternionTimeline:
+    """
+    Short, time-ordered history of received (timestamp, [w, x, y, z]) samples.
+    Nothing is interpolated ahead of time, Interpolate.sample() only evaluates the frames that get displayed.
+    """
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self.times = []
+        self.quaternions = []
+        self.lock = threading.Lock() #packets are added & frames sampled from different threads
+
+    def __len__(self):
+        return len(self.times)
+
+    def add(self, timestamp: float, quaternion: list) -> bool:
+        """
+        False if the sample was dropped, out of order or a duplicate (the timeline stays monotonic)
+        """
+        with self.lock:
+            if self.times and timestamp <= self.times[-1]:
+                return False
+
+            self.times.append(timestamp)
+            self.quaternions.append(quaternion)
+
+            if len(self.times) > 2 * self.capacity: #trim in chunks, amortized O(1) per add
+                del self.times[:-self.capacity]
+                del self.quaternions[:-self.capacity]
+
+            return True
+
+    def bracket(self, timestamp: float):
+        """
+        O(log n) lookup of the samples surrounding timestamp: (t0, q0, t1, q1)
+        Before the first/after the last sample both ends are the held endpoint, None if empty.
+        """
+        with self.lock:
+            if not self.times:
+                return None
+
+            i = bisect_right(self.times, timestamp)
+
+            if i == 0:
+                return self.times[0], self.quaternions[0], self.times[0], self.quaternions[0]
+            if i == len(self.times):
+                return self.times[-1], self.quaternions[-1], self.times[-1], self.quaternions[-1]
+
+            return self.times[i - 1], self.quaternions[i - 1], self.times[i], self.quaternions[i]
+
+    def latest_time(self):
+        with self.lock:
+            return self.times[-1] if self.times else None
+
+class QuaternionSpline(QuaternionTimeline):
+    """
+    SQUAD (spherical cubic) spline over the timeline, C1-smooth where SLERP changes angular velocity at every packet.
+
+    The control quaternion s_i = q_i * exp(-(log(q_i^-1 q_i+1) + log(q_i^-1 q_i-1)) / 4) needs the NEXT sample,
+    so each add() finishes s for the previous sample and leaves the newest one at s_n = q_n, constant work per packet.
+    Segments are treated as evenly spaced, which holds closely enough at a steady LoRa packet rate.
+
+    Across a rotation of more than max_angle between neighbouring samples (lost packets, a tumble) the tangent
+    overshoots badly, so s_i stays at q_i there and the segments on either side of the jump are plain SLERP.
+    """
+    def __init__(self, capacity: int = 64, max_angle: float = SQUAD_MAX_ANGLE):
+        super().__init__(capacity)
+        self.controls = []
+        self.max_angle = max_angle #radians
+
+    def add(self, timestamp: float, quaternion: list) -> bool:
+        with self.lock:
+            if self.times and timestamp <= self.times[-1]:
+                return False
+
+            q = np.array(quaternion, dtype=float)
+            q /= np.linalg.norm(q)
+
+            if self.quaternions and np.dot(self.quaternions[-1], q) < 0.0: #same hemisphere as the last sample
+                q = -q
+
+            self.times.append(timestamp)
+            self.quaternions.append(q)
+            self.controls.append(q)
+
+            if len(self.quaternions) >= 3:
+                prev, cur = self.quaternions[-3], self.quaternions[-2]
+                if max(qb.angular_distance(prev, cur), qb.angular_distance(cur, q)) <= self.max_angle: #else controls[-2] stays cur
+                    inverse = qb.conjugate(cur)
+                    tangent = (qb.log(qb.multiply(inverse, q)) + qb.log(qb.multiply(inverse, prev))) / -4.0
+                    self.controls[-2] = qb.multiply(cur, qb.exp(tangent))
+
+            if len(self.times) > 2 * self.capacity:
+                del self.times[:-self.capacity]
+                del self.quaternions[:-self.capacity]
+                del self.controls[:-self.capacity]
+
+            return True
+
+    def evaluate(self, timestamps) -> np.ndarray:
+        """
+        Vectorized SQUAD at an array of timestamps -> (N, 4), held at the ends, None if empty.
+        O(log n) bisection per timestamp, only each one's segment ends & controls are copied out of the timeline.
+        """
+        timestamps = np.atleast_1d(np.asarray(timestamps, dtype=float))
+
+        with self.lock:
+            if not self.times:
+                return None
+
+            if len(self.times) == 1:
+                return np.repeat(np.array(self.quaternions[:1]), len(timestamps), axis=0)
+
+            last = len(self.times) - 2
+            segments = [min(max(bisect_right(self.times, t) - 1, 0), last) for t in timestamps.tolist()]
+
+            t0 = np.array([self.times[i] for i in segments])
+            t1 = np.array([self.times[i + 1] for i in segments])
+            q0 = np.array([self.quaternions[i] for i in segments])
+            q1 = np.array([self.quaternions[i + 1] for i in segments])
+            s0 = np.array([self.controls[i] for i in segments])
+            s1 = np.array([self.controls[i + 1] for i in segments])
+
+        h = np.clip((timestamps - t0) / (t1 - t0), 0.0, 1.0)
+
+        outer = qb.slerp(q0, q1, h)
+        inner = qb.slerp(s0, s1, h)
+        return qb.slerp(outer, inner, 2.0 * h * (1.0 - h))
+
 class Interpolate:
-    def __init__(self, fps = 20):
+    def __init__(self, fps = 20, method = "slerp"):
+        """
+        method: "slerp" (piecewise linear on the sphere) or "squad" (spline), only used by the timeline mode
+        """
         self.lastquaternion = None
         self.fps = fps
+        self.stream_time = 0.0 # sender's mission time (seconds) of the newest packet
+        self.method = method
+        self.timeline = QuaternionSpline() if method == "squad" else QuaternionTimeline()
 
     def slerp(self, q1: list, q2: list, t) -> list: # math used to interpolate quanterions
         """
@@ -44,6 +184,16 @@ class Interpolate:
 
         return (q1 * cos(theta) + q_perp * sin(theta))
 
+    def validate(self, quaternion: dict):
+        """
+        Quaternion dictionary -> [w, x, y, z], None (and a log line) if any component is bad data
+        """
+        if len([x for x in quaternion.values() if type(x) != float or x < -1 or x > 1]) != 0:
+            print(f"Error interpolating bad data, returning last valid quaternion: {quaternion.items()}", flush=True)
+            return None
+
+        return [quaternion["rotation_w"], quaternion["rotation_x"], quaternion["rotation_y"], quaternion["rotation_z"]]
+
     def interpolate_quaternion(self, time_delta: float, quaternion: dict) -> list: # This is the method you would call for the interpolated data, returns a list of list with the original and interpolated data
         """
         Interpolates between quaternions in the input data using SLERP and includes the original quaternions.
@@ -52,11 +202,10 @@ class Interpolate:
         :return: List of quaternions including both original and interpolated quaternions.
         """
         
-        if len([x for x in quaternion.values() if type(x) != float or x < -1 or x > 1]) != 0:
-            print(f"Error interpolating bad data, returning last valid quaternion: {quaternion.items()}", flush=True)
-            return self.lastquaternion
+        quaternion = self.validate(quaternion)
 
-        quaternion = [quaternion["rotation_w"], quaternion["rotation_x"], quaternion["rotation_y"], quaternion["rotation_z"]]
+        if quaternion is None:
+            return self.lastquaternion
 
         if self.lastquaternion is None:
             self.lastquaternion = quaternion
@@ -94,4 +243,84 @@ class Interpolate:
         
         self.lastquaternion = q2 #last value of q2
 
-        return combined_quats
\ No newline at end of file
+        return combined_quats
+
+    def interpolate_timed(self, timestamp: float, quaternion: dict) -> list:
+        """
+        Same as interpolate_quaternion, but every frame is paired with its stream timestamp so the client
+        can play frames out at the times they were computed for instead of at the rate they arrive.
+
+        :param timestamp: Sender's mission time of the packet in seconds.
+        :param quaternion: Quaternion dictionary of the new packet.
+        :return: List of (timestamp, [w, x, y, z]) on the sender's clock, lost packets leave a gap instead of a shift.
+                 The previous packet's quaternion is NOT repeated, it was already the last frame of the last batch.
+        """
+
+        first_packet = self.lastquaternion is None
+        time_delta = 0.0 if first_packet else timestamp - self.stream_time
+
+        if time_delta < 0: #late or duplicate packet, the timeline already moved past it
+            return []
+
+        all_interpolated = self.interpolate_quaternion(time_delta, quaternion)
+
+        if all_interpolated is None: #bad data before any valid quaternion
+            return []
+
+        if type(all_interpolated[0]) == float: #1d [], first iter or bad data
+            self.stream_time = timestamp
+            if first_packet:
+                return [(timestamp, list(all_interpolated))]
+            return [] #bad data, last valid quaternion is already on the client
+
+        start_time = self.stream_time
+        self.stream_time = timestamp
+        step = time_delta / (len(all_interpolated) - 1)
+
+        timed = []
+        for i in range(1, len(all_interpolated)): #skip q1, see docstring
+            interpolated_quaternion = all_interpolated[i]
+            
+            if not isinstance(interpolated_quaternion, list): #if is np.array, make list
+                interpolated_quaternion = interpolated_quaternion.tolist()
+            
+            timed.append((start_time + i * step, interpolated_quaternion))
+
+        return timed
+
+    def add_sample(self, timestamp: float, quaternion: dict) -> bool:
+        """
+        Timeline mode: records the packet at its mission timestamp without interpolating anything.
+        Frames are computed later by sample() at whatever times they're actually rendered.
+
+        :return: True if the packet was valid and added, False for bad data or a sample out of order on the timeline.
+        """
+        quaternion = self.validate(quaternion)
+
+        if quaternion is None or not self.timeline.add(timestamp, quaternion):
+            return False
+
+        self.stream_time = max(self.stream_time, timestamp)
+        self.lastquaternion = quaternion
+        return True
+
+    def sample(self, stream_time: float):
+        """
+        SLERPs the timeline at an arbitrary stream timestamp, held at the ends, None before any packet.
+        Independent of self.fps, so packets closer together than one frame still move the rocket.
+        """
+        if self.method == "squad":
+            frames = self.timeline.evaluate(stream_time)
+            return None if frames is None else frames[0].tolist()
+
+        bracket = self.timeline.bracket(stream_time)
+
+        if bracket is None:
+            return None
+
+        t0, q0, t1, q1 = bracket
+        if t1 <= t0:
+            return list(q0)
+
+        quaternion = self.slerp(q0, q1, (stream_time - t0) / (t1 - t0))
+        return quaternion.tolist() if not isinstance(quaternion, list) else quaternion
@@ -0,0 +1,97 @@
+"""
+Launch detection & pre-trigger buffering for the flight logger.
+
+On the pad the logger samples at full rate but only writes & transmits every Nth sample, the full-rate stream is kept
+in memory for the last few seconds. When the detector fires, whatever of that buffer wasn't written yet goes to the
+log ahead of the launch sample, so the log still has the full-rate lead-up to ignition.
+"""
+
+import math
+from collections import deque
+
+class LaunchDetector:
+    """
+    Latches on the first of:
+        linear acceleration magnitude (gravity removed) >= accel_threshold for accel_hold seconds
+        barometric climb rate >= climb_threshold, averaged over climb_window seconds
+    O(1) amortized per sample.
+    """
+    def __init__(self, accel_threshold: float, accel_hold: float, climb_threshold: float, climb_window: float = 1.0):
+        self.accel_threshold = accel_threshold
+        self.accel_hold = accel_hold
+        self.climb_threshold = climb_threshold
+        self.climb_window = climb_window
+
+        self.launched = False
+        self.launch_time = None #mission time the triggering condition started
+        self.reason = None
+
+        self.accel_since = None
+        self.altitudes = deque() #(time, altitude) of distinct barometer readings within climb_window
+
+    def update(self, t: float, linear_acceleration, altitude) -> bool:
+        if self.launched:
+            return True
+
+        if linear_acceleration is not None and None not in linear_acceleration:
+            magnitude = math.sqrt(sum(component * component for component in linear_acceleration))
+
+            if magnitude >= self.accel_threshold:
+                if self.accel_since is None:
+                    self.accel_since = t
+                if t - self.accel_since >= self.accel_hold:
+                    return self._trigger(self.accel_since, "acceleration")
+            else:
+                self.accel_since = None
+
+        #the altimeter thread updates a few times a second, only distinct readings go in the window
+        if isinstance(altitude, (int, float)) and (not self.altitudes or altitude != self.altitudes[-1][1]):
+            self.altitudes.append((t, altitude))
+
+            while t - self.altitudes[0][0] > self.climb_window:
+                self.altitudes.popleft()
+
+            first_time, first_altitude = self.altitudes[0]
+            if t - first_time >= self.climb_window / 2:
+                if (altitude - first_altitude) / (t - first_time) >= self.climb_threshold:
+                    return self._trigger(first_time, "barometer")
+
+        return False
+
+    def _trigger(self, launch_time: float, reason: str) -> bool:
+        self.launched = True
+        self.launch_time = launch_time
+        self.reason = reason
+        return True
+
+class PreTriggerBuffer:
+    """
+    The last `seconds` of full-rate log lines, every `decimation`th one marked to be written & transmitted right away
+    """
+    def __init__(self, seconds: float, decimation: int):
+        self.seconds = seconds
+        self.decimation = max(1, decimation)
+
+        self.entries = deque() #(time, line, written)
+        self.count = 0
+
+    def push(self, t: float, line: str) -> bool:
+        """
+        Buffers the sample, returns whether it's one of the decimated ones to write & transmit now
+        """
+        write = self.count % self.decimation == 0
+        self.count += 1
+
+        self.entries.append((t, line, write))
+        while t - self.entries[0][0] > self.seconds:
+            self.entries.popleft()
+
+        return write
+
+    def drain(self) -> list:
+        """
+        Buffered lines that weren't written yet, oldest first, and empties the buffer
+        """
+        lines = [line for _, line, written in self.entries if not written]
+        self.entries.clear()
+        return lines
@@ -0,0 +1,92 @@
+import threading, time
+from collections import deque
+
+from reyax import SEQUENCE_MODULUS, sequence_gap
+
+class LinkStats:
+    """
+    Running radio link quality from the sequence number, RSSI & SNR every decoded packet carries (see parse_link_fields).
+    Used to compare AT+PARAMETER settings for throughput vs range with real numbers.
+    """
+    def __init__(self, window: int = 256):
+        self.lock = threading.Lock()
+
+        self.received = 0
+        self.lost = 0
+        self.recovered = 0 #lost frames rebuilt from redundant copies, see RYLR998.recover_lost
+        self.duplicates = 0
+        self.corrupt = 0
+        self.last_sequence = None
+
+        #RFC 3550 style inter-arrival jitter: how much arrival spacing deviates from the sender's own sample spacing
+        self.last_arrival = None
+        self.last_mission_time = None
+        self.jitter = 0.0
+
+        #recent RSSI/SNR for the distribution, bounded
+        self.rssi = deque(maxlen=window)
+        self.snr = deque(maxlen=window)
+
+    def record(self, mission_time: float, link: dict):
+        arrival = link.get("arrival", time.monotonic())
+
+        with self.lock:
+            sequence = link.get("sequence")
+            consecutive = False #jitter only compares back-to-back packets
+
+            if sequence is not None and self.last_sequence is not None:
+                gap = sequence_gap(sequence, self.last_sequence)
+                if gap == 0:
+                    self.duplicates += 1
+                    return
+                if gap is not None and gap < SEQUENCE_MODULUS // 2: #anything larger is a sender restart or reordering, not loss
+                    self.lost += gap - 1
+                consecutive = gap == 1
+
+            self.last_sequence = sequence
+            self.received += 1
+            self.recovered += len(link.get("recovered", ()))
+            self.corrupt = link.get("corrupt", self.corrupt)
+
+            if consecutive and self.last_arrival is not None:
+                deviation = abs((arrival - self.last_arrival) - (mission_time - self.last_mission_time))
+                self.jitter += (deviation - self.jitter) / 16
+            self.last_arrival = arrival
+            self.last_mission_time = mission_time
+
+            if link.get("rssi") is not None:
+                self.rssi.append(link["rssi"])
+            if link.get("snr") is not None:
+                self.snr.append(link["snr"])
+
+    @staticmethod
+    def _distribution(values) -> dict:
+        if not values:
+            return None
+
+        ordered = sorted(values)
+        pick = lambda fraction: ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+        return {
+            "min": ordered[0],
+            "p10": pick(0.1),
+            "p50": pick(0.5),
+            "p90": pick(0.9),
+            "max": ordered[-1],
+            "mean": round(sum(ordered) / len(ordered), 2),
+        }
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            expected = self.received + self.lost
+            return {
+                "received": self.received,
+                "lost": self.lost,
+                "loss_rate": round(self.lost / expected, 4) if expected else 0.0,
+                "recovered": self.recovered,
+                "effective_loss_rate": round((self.lost - self.recovered) / expected, 4) if expected else 0.0, #after backfill
+                "duplicates": self.duplicates,
+                "corrupt": self.corrupt,
+                "jitter_ms": round(self.jitter * 1000, 2),
+                "rssi": self._distribution(self.rssi),
+                "snr": self._distribution(self.snr),
+            }
@@ -0,0 +1,187 @@
+"""
+Compiles the Wavefront OBJ/MTL rocket model into a binary mesh the browser can hand straight to WebGL,
+so the visualizer never parses 400+ KB of OBJ text in JavaScript.
+
+FILE FORMAT (little-endian):
+    b"RKM1" | uint32 header_length | JSON header (space padded to 4 bytes) | Float32 vertices | Uint16 indices
+
+    vertices are interleaved [px, py, pz, nx, ny, nz, u, v], header["stride"] bytes each
+    header["ranges"] holds one {material, diffuse, first, count} per material, first & count are in indices
+
+The compiled mesh is cached gzip-compressed on disk, keyed by the sha256 of the OBJ and its MTL libraries.
+"""
+
+import gzip, hashlib, json, os, struct
+from array import array
+
+MESH_MAGIC = b"RKM1"
+FLOATS_PER_VERTEX = 8 #position(3), normal(3), texcoord(2)
+
+def _mtl_paths(obj_path: str) -> list:
+    directory = os.path.dirname(obj_path)
+    paths = []
+
+    with open(obj_path, "r") as f:
+        for line in f:
+            if line.startswith("mtllib"):
+                paths.append(os.path.join(directory, line.split(maxsplit=1)[1].strip()))
+
+    return paths
+
+def source_hash(obj_path: str) -> str:
+    """
+    sha256 over the OBJ and every MTL it references, changes to either invalidate the cache
+    """
+    digest = hashlib.sha256()
+
+    for path in [obj_path, *_mtl_paths(obj_path)]:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+
+    return digest.hexdigest()
+
+def parse_mtl(mtl_path: str) -> dict:
+    """
+    Returns {material_name: [r, g, b, a]} from the Kd (diffuse) and d (dissolve) statements
+    """
+    materials = {}
+    material = None
+
+    with open(mtl_path, "r") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+
+            if parts[0] == "newmtl":
+                material = parts[1]
+                materials[material] = [1.0, 1.0, 1.0, 1.0]
+            elif material and parts[0] == "Kd":
+                materials[material][:3] = [float(x) for x in parts[1:4]]
+            elif material and parts[0] == "d":
+                materials[material][3] = float(parts[1])
+
+    return materials
+
+def compile_obj(obj_path: str) -> bytes:
+    """
+    Parses an OBJ the same way parseOBJ in webgl-demo.js did (polygons fanned into triangles, negative indices allowed),
+    but de-duplicates (v, vt, vn) corners into an indexed, interleaved vertex buffer grouped by material
+    """
+    materials = {}
+    for mtl_path in _mtl_paths(obj_path):
+        if os.path.exists(mtl_path):
+            materials.update(parse_mtl(mtl_path))
+
+    # because indices are base 1 let's just fill in the 0th data
+    positions, texcoords, normals = [(0.0, 0.0, 0.0)], [(0.0, 0.0)], [(0.0, 0.0, 0.0)]
+
+    vertices = array("f")
+    indices = array("H")
+    corner_index = {} #(v, vt, vn) -> vertex index
+    ranges = []
+
+    def resolve(index_str: str, table: list) -> int:
+        if not index_str:
+            return 0
+        index = int(index_str)
+        return index if index >= 0 else len(table) + index
+
+    def add_corner(corner: str) -> int:
+        ptn = (corner.split("/") + ["", ""])[:3]
+        key = (resolve(ptn[0], positions), resolve(ptn[1], texcoords), resolve(ptn[2], normals))
+
+        if key not in corner_index:
+            if len(corner_index) > 0xFFFF:
+                raise ValueError(f"{obj_path} has more than 65536 unique vertices, too many for Uint16 indices")
+
+            corner_index[key] = len(corner_index)
+            vertices.extend(positions[key[0]])
+            vertices.extend(normals[key[2]])
+            vertices.extend(texcoords[key[1]][:2])
+
+        return corner_index[key]
+
+    def use_material(name: str):
+        if ranges and ranges[-1]["count"] == 0:
+            ranges.pop()
+        ranges.append({
+            "material": name,
+            "diffuse": materials.get(name, [1.0, 1.0, 1.0, 1.0]),
+            "first": len(indices),
+            "count": 0,
+        })
+
+    use_material("default")
+
+    with open(obj_path, "r") as f:
+        for line in f:
+            parts = line.split()
+            if not parts or parts[0].startswith("#"):
+                continue
+
+            keyword = parts[0]
+            if keyword == "v":
+                positions.append(tuple(float(x) for x in parts[1:4]))
+            elif keyword == "vn":
+                normals.append(tuple(float(x) for x in parts[1:4]))
+            elif keyword == "vt":
+                texcoords.append(tuple(float(x) for x in parts[1:3]))
+            elif keyword == "usemtl":
+                use_material(parts[1])
+            elif keyword == "f":
+                corners = [add_corner(corner) for corner in parts[1:]]
+                for tri in range(len(corners) - 2):
+                    indices.extend((corners[0], corners[tri + 1], corners[tri + 2]))
+                ranges[-1]["count"] += 3 * (len(corners) - 2)
+
+    if ranges[-1]["count"] == 0:
+        ranges.pop()
+
+    header = json.dumps({
+        "stride": FLOATS_PER_VERTEX * 4,
+        "attributes": {"a_position": [3, 0], "a_normal": [3, 12], "a_texcoord": [2, 24]}, #numComponents, byte offset
+        "vertexCount": len(corner_index),
+        "indexCount": len(indices),
+        "ranges": ranges,
+    }).encode()
+    header += b" " * (-len(header) % 4) #Float32Array views must start 4-byte aligned
+
+    if vertices.itemsize != 4 or indices.itemsize != 2:
+        raise RuntimeError("platform array sizes don't match Float32/Uint16")
+
+    if struct.pack("=H", 1) != struct.pack("<H", 1): #big-endian host
+        vertices.byteswap()
+        indices.byteswap()
+
+    return MESH_MAGIC + struct.pack("<I", len(header)) + header + vertices.tobytes() + indices.tobytes()
+
+def load_mesh(obj_path: str, cache_dir: str) -> tuple:
+    """
+    Returns (source_hash, gzipped mesh), compiling & writing the cache only when the sources changed
+    """
+    mesh_hash = source_hash(obj_path)
+    name = os.path.splitext(os.path.basename(obj_path))[0]
+    cache_path = os.path.join(cache_dir, f"{name}-{mesh_hash[:16]}.rkm.gz")
+
+    if os.path.exists(cache_path):
+        with open(cache_path, "rb") as f:
+            return mesh_hash, f.read()
+
+    compressed = gzip.compress(compile_obj(obj_path), compresslevel=9, mtime=0)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_path + ".tmp", "wb") as f:
+        f.write(compressed)
+    os.replace(cache_path + ".tmp", cache_path) #never leave a half written cache entry behind
+
+    print(f"Compiled {obj_path} -> {cache_path} ({len(compressed)} bytes gzipped)", flush=True)
+    return mesh_hash, compressed
+
+if __name__ == "__main__": #build step, python meshcache.py [model.obj ...]
+    import sys
+
+    model_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "model")
+    for path in sys.argv[1:] or [os.path.join(model_dir, "rocket_edited.obj")]:
+        load_mesh(path, os.path.join(model_dir, "cache"))
@@ -0,0 +1,135 @@
+"""
+Low-overhead stage timing for the flight logger's sampling loop.
+
+    profiler = make_profiler(["i2c", "json", ...], enabled=True)
+
+    cycle = profiler.start()
+    t = profiler.lap("i2c", cycle) #records time since cycle, returns now
+    t = profiler.lap("json", t)
+    profiler.end_cycle(cycle) #achieved rate & jitter, periodic dump to the log
+
+Timings go into preallocated power-of-two nanosecond histograms, nothing is allocated per sample.
+With enabled=False every call is an empty method on NullProfiler.
+"""
+
+import logging, time
+
+BUCKETS = 40 #bucket b holds durations in [2^(b-1), 2^b) ns, 2^39 ns ~ 9 minutes
+
+class StageProfiler:
+    def __init__(self, stages: list, dump_interval: float = 10.0):
+        self.stages = list(stages)
+        self.dump_interval = dump_interval
+
+        self.histograms = {stage: [0] * BUCKETS for stage in self.stages}
+        self.totals = {stage: 0 for stage in self.stages}
+        self.counts = {stage: 0 for stage in self.stages}
+        self.maxima = {stage: 0 for stage in self.stages}
+
+        #cycle period stats (Welford), ns
+        self.last_cycle = None
+        self.cycles = 0
+        self.period_mean = 0.0
+        self.period_m2 = 0.0
+        self.period_min = None
+        self.period_max = 0
+
+        self.last_dump = time.perf_counter_ns()
+
+    def start(self) -> int:
+        return time.perf_counter_ns()
+
+    def lap(self, stage: str, since: int) -> int:
+        now = time.perf_counter_ns()
+        elapsed = now - since
+
+        self.histograms[stage][min(elapsed.bit_length(), BUCKETS - 1)] += 1
+        self.totals[stage] += elapsed
+        self.counts[stage] += 1
+        if elapsed > self.maxima[stage]:
+            self.maxima[stage] = elapsed
+
+        return now
+
+    def end_cycle(self, cycle_start: int):
+        if self.last_cycle is not None:
+            period = cycle_start - self.last_cycle
+
+            self.cycles += 1
+            delta = period - self.period_mean
+            self.period_mean += delta / self.cycles
+            self.period_m2 += delta * (period - self.period_mean)
+
+            if self.period_min is None or period < self.period_min:
+                self.period_min = period
+            if period > self.period_max:
+                self.period_max = period
+
+        self.last_cycle = cycle_start
+
+        if cycle_start - self.last_dump > self.dump_interval * 1e9:
+            self.dump()
+
+    def _percentile(self, stage: str, fraction: float) -> int:
+        """
+        Upper bound (ns) of the histogram bucket holding the given fraction of samples
+        """
+        target = fraction * self.counts[stage]
+        running = 0
+        for bucket, count in enumerate(self.histograms[stage]):
+            running += count
+            if running >= target:
+                return 1 << bucket
+        return 1 << (BUCKETS - 1)
+
+    def summary(self) -> str:
+        lines = []
+
+        if self.cycles:
+            jitter = (self.period_m2 / self.cycles) ** 0.5
+            lines.append(
+                f"rate {1e9 / self.period_mean:.1f} Hz over {self.cycles} cycles | period mean {self.period_mean / 1e6:.2f} ms "
+                f"jitter {jitter / 1e6:.2f} ms min {self.period_min / 1e6:.2f} ms max {self.period_max / 1e6:.2f} ms"
+            )
+
+        for stage in self.stages:
+            count = self.counts[stage]
+            if not count:
+                continue
+
+            lines.append(
+                f"{stage:>10}: mean {self.totals[stage] / count / 1e3:8.1f} us | p50 <{self._percentile(stage, 0.5) / 1e3:8.1f} us | "
+                f"p99 <{self._percentile(stage, 0.99) / 1e3:8.1f} us | max {self.maxima[stage] / 1e3:8.1f} us | n {count}"
+            )
+
+        return "\n".join(lines)
+
+    def dump(self):
+        self.last_dump = time.perf_counter_ns()
+
+        summary = self.summary()
+        if summary:
+            logging.info(f"STAGE TIMINGS\n{summary}")
+            print(f"STAGE TIMINGS\n{summary}", flush=True)
+
+class NullProfiler:
+    """
+    Stand-in when profiling is off, keeps the call sites unconditional
+    """
+    def start(self) -> int:
+        return 0
+
+    def lap(self, stage: str, since: int) -> int:
+        return 0
+
+    def end_cycle(self, cycle_start: int):
+        pass
+
+    def summary(self) -> str:
+        return ""
+
+    def dump(self):
+        pass
+
+def make_profiler(stages: list, enabled: bool, dump_interval: float = 10.0):
+    return StageProfiler(stages, dump_interval) if enabled else NullProfiler()
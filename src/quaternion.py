@@ -1,3 +1,5 @@
+import math
+
 def quaternion_inverse(w, x, y, z):
     """
     Returns the inverse of a (possibly non-unit) quaternion.
@@ -44,6 +46,49 @@ def quaternion_relative(w0, x0, y0, z0, w1, x1, y1, z1):
     # Step 2: multiply (q0^-1) by q1
     return quaternion_multiply(inv_w0, inv_x0, inv_y0, inv_z0, w1, x1, y1, z1)
 
+class ReferenceFrame:
+    """
+    Zeroed attitude for the sampling loop: the inverse of the reference quaternion is computed once
+    (and again only on rezero), so relative() is a single quaternion product per sample.
+    """
+    def __init__(self, reference):
+        self.rezero(reference)
+
+    def rezero(self, reference):
+        """
+        Makes reference (w, x, y, z) the new zero attitude
+        """
+        self.reference = tuple(reference)
+        self.inverse = quaternion_inverse(*self.reference)
+
+    def relative(self, current):
+        """
+        Same result as quaternion_relative(*reference, *current) without re-inverting the reference.
+        Returns (None, None, None, None) if the sensor handed back a None component (gets caught & handled in outer scope)
+        """
+        w1, x1, y1, z1 = current
+
+        if w1 is None or x1 is None or y1 is None or z1 is None:
+            return (None, None, None, None)
+
+        w0, x0, y0, z0 = self.inverse #quaternion_multiply inlined, this runs every sample
+        return (
+            w0*w1 - x0*x1 - y0*y1 - z0*z1,
+            w0*x1 + x0*w1 + y0*z1 - z0*y1,
+            w0*y1 + y0*w1 + z0*x1 - x0*z1,
+            w0*z1 + z0*w1 + x0*y1 - y0*x1,
+        )
+
+def quaternion_to_euler(w, x, y, z):
+    """
+    Returns (roll, pitch, yaw) in radians for a unit quaternion (x, y, z rotations, ZYX order).
+    Pitch is clamped at +-90deg; quaternion_batch.to_euler is the same conversion over arrays.
+    """
+    roll = math.atan2(2.0 * (w * x + y * z), 1.0 - 2.0 * (x * x + y * y))
+    pitch = math.asin(max(-1.0, min(1.0, 2.0 * (w * y - z * x))))
+    yaw = math.atan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z))
+    return (roll, pitch, yaw)
+
 # Example usage:
 # Suppose q0 = (1, 0, 0, 0) (the identity quaternion, no rotation)
 # and q1 = (0.707, 0.707, 0.0, 0.0) (a 90-degree rotation around X-axis).
@@ -0,0 +1,144 @@
+"""
+Vectorized quaternion algebra over numpy arrays of shape (N, 4), rows are [w, x, y, z].
+Every function also accepts a single (4,) quaternion and broadcasts like numpy does.
+
+The scalar versions in quaternion.py stay the fast path for the per-sample flight loop (no numpy import there),
+this module is for log processing, replay, interpolation and visualization.
+"""
+
+import numpy as np
+
+def as_quaternions(q) -> np.ndarray:
+    return np.asarray(q, dtype=float)
+
+def normalize(q) -> np.ndarray:
+    q = as_quaternions(q)
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+def conjugate(q) -> np.ndarray:
+    return as_quaternions(q) * np.array([1.0, -1.0, -1.0, -1.0])
+
+def inverse(q) -> np.ndarray:
+    """
+    Inverse(q) = Conjugate(q) / ||q||^2, works for non-unit quaternions
+    """
+    q = as_quaternions(q)
+    return conjugate(q) / np.sum(q * q, axis=-1, keepdims=True)
+
+def multiply(a, b) -> np.ndarray:
+    """
+    Hamilton product a * b, row by row
+    """
+    w1, x1, y1, z1 = np.moveaxis(as_quaternions(a), -1, 0)
+    w2, x2, y2, z2 = np.moveaxis(as_quaternions(b), -1, 0)
+    return np.stack((
+        w1*w2 - x1*x2 - y1*y2 - z1*z2,
+        w1*x2 + x1*w2 + y1*z2 - z1*y2,
+        w1*y2 + y1*w2 + z1*x2 - x1*z2,
+        w1*z2 + z1*w2 + x1*y2 - y1*x2,
+    ), axis=-1)
+
+def relative(reference, q) -> np.ndarray:
+    """
+    reference^-1 * q, the rotation from the reference attitude to q (see quaternion_relative)
+    """
+    return multiply(inverse(reference), q)
+
+def log(q) -> np.ndarray:
+    """
+    Log of unit quaternions -> pure quaternions (w = 0)
+    """
+    q = as_quaternions(q)
+    theta = np.arccos(np.clip(q[..., 0], -1.0, 1.0))
+    sin_theta = np.sin(theta)
+    scale = np.where(sin_theta > 1e-9, theta / np.where(sin_theta > 1e-9, sin_theta, 1.0), 1.0)
+    return np.concatenate((np.zeros(q.shape[:-1] + (1,)), q[..., 1:] * scale[..., None]), axis=-1)
+
+def exp(v) -> np.ndarray:
+    """
+    Exp of pure quaternions -> unit quaternions
+    """
+    v = as_quaternions(v)
+    theta = np.linalg.norm(v[..., 1:], axis=-1)
+    scale = np.where(theta > 1e-9, np.sin(theta) / np.where(theta > 1e-9, theta, 1.0), 1.0)
+    return np.concatenate((np.cos(theta)[..., None], v[..., 1:] * scale[..., None]), axis=-1)
+
+def slerp(a, b, h) -> np.ndarray:
+    """
+    Row-wise SLERP from a to b by factors h, shortest path, linear when nearly parallel, normalized result
+    """
+    a, b = as_quaternions(a), as_quaternions(b)
+    h = np.asarray(h, dtype=float)
+
+    dot = np.sum(a * b, axis=-1)
+    b = np.where((dot < 0.0)[..., None], -b, b)
+    dot = np.abs(dot)
+
+    theta = np.arccos(np.clip(dot, -1.0, 1.0))
+    sin_theta = np.sin(theta)
+    close = dot > 0.9995
+
+    safe_sin = np.where(close, 1.0, sin_theta)
+    wa = np.where(close, 1.0 - h, np.sin((1.0 - h) * theta) / safe_sin)
+    wb = np.where(close, h, np.sin(h * theta) / safe_sin)
+
+    return normalize(a * wa[..., None] + b * wb[..., None])
+
+def angular_distance(a, b) -> np.ndarray:
+    """
+    Smallest rotation angle (radians) between attitudes a and b, q and -q count as the same attitude
+    """
+    dot = np.abs(np.sum(normalize(a) * normalize(b), axis=-1))
+    return 2.0 * np.arccos(np.clip(dot, 0.0, 1.0))
+
+def to_rotation_matrix(q) -> np.ndarray:
+    """
+    Unit quaternions -> (N, 3, 3) rotation matrices
+    """
+    w, x, y, z = np.moveaxis(as_quaternions(q), -1, 0)
+    return np.stack((
+        np.stack((1 - 2 * (y*y + z*z), 2 * (x*y - z*w), 2 * (x*z + y*w)), axis=-1),
+        np.stack((2 * (x*y + z*w), 1 - 2 * (x*x + z*z), 2 * (y*z - x*w)), axis=-1),
+        np.stack((2 * (x*z - y*w), 2 * (y*z + x*w), 1 - 2 * (x*x + y*y)), axis=-1),
+    ), axis=-2)
+
+def rotate_vectors(q, v) -> np.ndarray:
+    """
+    Rotates vectors v (N, 3) (or one (3,) vector for every q) by unit quaternions q
+    """
+    q = as_quaternions(q)
+    v = np.asarray(v, dtype=float)
+
+    u = q[..., 1:]
+    w = q[..., :1]
+    t = 2.0 * np.cross(u, v)
+    return v + w * t + np.cross(u, t)
+
+def to_euler(q) -> np.ndarray:
+    """
+    Unit quaternions -> (N, 3) [roll, pitch, yaw] in radians (x, y, z rotations, ZYX order), pitch clamped at +-90deg
+    """
+    w, x, y, z = np.moveaxis(as_quaternions(q), -1, 0)
+
+    roll = np.arctan2(2.0 * (w*x + y*z), 1.0 - 2.0 * (x*x + y*y))
+    pitch = np.arcsin(np.clip(2.0 * (w*y - z*x), -1.0, 1.0))
+    yaw = np.arctan2(2.0 * (w*z + x*y), 1.0 - 2.0 * (y*y + z*z))
+
+    return np.stack((roll, pitch, yaw), axis=-1)
+
+def from_euler(angles) -> np.ndarray:
+    """
+    (N, 3) [roll, pitch, yaw] in radians -> unit quaternions, inverse of to_euler
+    """
+    roll, pitch, yaw = np.moveaxis(np.asarray(angles, dtype=float) / 2.0, -1, 0)
+
+    cr, sr = np.cos(roll), np.sin(roll)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    cy, sy = np.cos(yaw), np.sin(yaw)
+
+    return np.stack((
+        cr*cp*cy + sr*sp*sy,
+        sr*cp*cy - cr*sp*sy,
+        cr*sp*cy + sr*cp*sy,
+        cr*cp*sy - sr*sp*cy,
+    ), axis=-1)
@@ -1,4 +1,11 @@
-from reyax import RYLR998, getStartMessage
+from reyax import RYLR998, encode_control
+from collections import deque
+import time
+
+#control message retries: resend after ACK_TIMEOUT, doubling up to ACK_MAX_TIMEOUT, ACK_ATTEMPTS sends in total
+ACK_TIMEOUT = 0.15
+ACK_MAX_TIMEOUT = 2.0
+ACK_ATTEMPTS = 6
 
 class RYLR998_Recieve:
     def __init__(self):
@@ -10,23 +17,61 @@ class RYLR998_Recieve:
         self.RYLR998 = RYLR998(uart_port, baud_rate, 1, address=2, network_id=1)  # Assuming address 2 for receiving
         self.ser = self.RYLR998.ser
 
-    def send_start_command(self, pressure: float, RPI02W_address: int = 1):
+        self.command_id = 0 #rolls over at 256, lets the rocket ignore retransmissions of a command it already ran
+        self.pending = deque(maxlen=256) #telemetry that arrived while waiting on an ack, handed out by recieve first
+
+    def send_control(self, command: str, argument=None, RPI02W_address: int = 1) -> dict:
         """
-        Send message to rocket to begin data_logging
+        Sends a control message (see reyax.CONTROL_COMMANDS) and resends it with exponential backoff until the rocket acks it.
+
+        returns {"command", "acked", "status" (the rocket's, None if never acked), "attempts", "elapsed" (seconds)}
         """
-        tries = 5 #99.99999% sure will always fall through, just once is good enough for 80% of trials
+        command_id = self.command_id
+        self.command_id = (self.command_id + 1) % 256
+
+        payload = encode_control(command_id, command, argument)
+        message = f"AT+SEND={RPI02W_address},{len(payload)},{payload}"
+
+        start = time.monotonic()
+        timeout = ACK_TIMEOUT
+        ack_key = (RPI02W_address, command_id) #only that rocket's ack counts
+        self.RYLR998.acks.pop(ack_key, None) #stale ack from the last time this id came around
+
+        for attempt in range(1, ACK_ATTEMPTS + 1):
+            response = self.RYLR998.send_command(message, retries=0)["response"]
+            print(f"Sent {command} cmd (attempt {attempt}), response: {response}", flush=True)
+
+            deadline = time.monotonic() + timeout
+            while ack_key not in self.RYLR998.acks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
 
-        for _ in range(tries):
-            pressure_payload = str(pressure)
-            payload = f"{getStartMessage()}|{pressure_payload}"
+                data = self.RYLR998.read_decoded_data(remaining) #records acks as they come in
+                if data:
+                    self.pending.append(data)
 
-            message = f"AT+SEND={RPI02W_address},{len(payload)},{payload}"
-            response = self.RYLR998.send_command(message)
-            print(f"Tried to send start cmd, response: {response}", flush=True)
+            if ack_key in self.RYLR998.acks:
+                return {
+                    "command": command,
+                    "acked": True,
+                    "status": self.RYLR998.acks.pop(ack_key),
+                    "attempts": attempt,
+                    "elapsed": round(time.monotonic() - start, 3),
+                }
 
-        return response
+            timeout = min(timeout * 2, ACK_MAX_TIMEOUT)
 
-    def recieve(self):
+        print(f"No ack for {command} cmd after {ACK_ATTEMPTS} attempts", flush=True)
+        return {"command": command, "acked": False, "status": None, "attempts": ACK_ATTEMPTS, "elapsed": round(time.monotonic() - start, 3)}
+
+    def send_start_command(self, pressure: float, RPI02W_address: int = 1) -> dict:
+        """
+        Send message to rocket to begin data_logging, an "ok" ack means it's logging ("rejected": bad pressure)
+        """
+        return self.send_control("start", pressure, RPI02W_address)
+
+    def recieve(self, timeout: float = None):
         """
         reads a payload of a time delta, and 8 quaternions
         timeDelta, {
@@ -40,5 +85,10 @@ class RYLR998_Recieve:
             "rotation_y" : short_to_quaternion(data[i+2]),
             "rotation_z" : short_to_quaternion(data[i+3])
         }, ...
+
+        returns None if timeout (seconds) passes without a packet
         """
-        return self.RYLR998.read_decoded_data()
+        if self.pending:
+            return self.pending.popleft()
+
+        return self.RYLR998.read_decoded_data(timeout)
@@ -0,0 +1,252 @@
+"""
+Ground-side flight recording: every packet the receiver decodes is appended to a binary file as it arrives,
+so the flight outlives the web process and any time range of it can be read back mid-flight or post-flight.
+
+    telemetry.bin           records, back to back:
+                                HEADER (payload length, kind, flags, sender address, sequence, mission time, receive time, rssi, snr)
+                                payload (attitude: float32 w, x, y, z | everything else: the decoded fields as JSON)
+    telemetry.<address>.idx INDEX_ENTRY (newest mission time of the address's records before offset, offset)
+                            every INDEX_INTERVAL seconds of that address's mission time
+
+Records are in arrival order, which is mission time order apart from backfilled (recovered) and late frames.
+Each transmitter starts its mission clock on its own start command, so every sender address gets its own index.
+An index stores the running maximum, so it's sorted regardless and a bisection finds where a range starts:
+everything of that address before the offset is older than the range. A range read stops once the address's records
+are REORDER_WINDOW past its end.
+
+All files are only ever appended to, one write per record, so a crash loses at most the record being written
+and TelemetryReader skips a torn one at the end. Mission times line up with the "time" field of the onboard log
+until the sender restarts, later epochs carry on from the last time seen (see reyax.MissionClock).
+"""
+
+import glob, json, os, struct, time
+
+RECORD_KINDS = ("attitude", "altitude", "health", "event") #kind byte is the index
+
+HEADER = ">HBBHHddhb" #payload length, kind, flags, address (NO_ADDRESS), sequence (NO_SEQUENCE), mission time (s), receive time (unix s), rssi, snr
+HEADER_SIZE = struct.calcsize(HEADER)
+INDEX_ENTRY = ">dQ"
+INDEX_ENTRY_SIZE = struct.calcsize(INDEX_ENTRY)
+
+FLAG_RECOVERED = 0x01 #attitude backfilled from a later frame's redundant copy
+NO_SEQUENCE = 0xFFFF
+NO_ADDRESS = 0xFFFF
+NO_RSSI, NO_SNR = -32768, -128
+
+INDEX_INTERVAL = 1.0 #seconds of mission time between index entries
+REORDER_WINDOW = 2.0 #how far out of mission time order a record can arrive and still be found by a range read
+
+def index_path(path: str, address: int) -> str:
+    return f"{os.path.splitext(path)[0]}.{address}.idx"
+
+class AddressIndex:
+    """
+    Writer side of one sender's index
+    """
+    def __init__(self, path: str):
+        self.file = open(path, "ab", buffering=0) #created right away, readers find the addresses by their index files
+        self.newest = None #running max mission time
+        self.next_index = None
+
+    def before(self, offset: int):
+        """
+        Called ahead of each of the address's records, with the offset it's about to be written at
+        """
+        if self.newest is not None and self.newest >= self.next_index:
+            self.file.write(struct.pack(INDEX_ENTRY, self.newest, offset))
+            self.next_index = self.newest + INDEX_INTERVAL
+
+    def after(self, mission_time: float):
+        if self.newest is None:
+            self.next_index = mission_time + INDEX_INTERVAL
+        if self.newest is None or mission_time > self.newest:
+            self.newest = mission_time
+
+class TelemetryRecorder:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        #unbuffered, each record is a single write() and on disk (page cache) as soon as it's recorded
+        self.data = open(path, "ab", buffering=0)
+        self.path = path
+
+        self.offset = os.fstat(self.data.fileno()).st_size
+        self.indexes = {} #address -> AddressIndex
+        self.records = 0
+
+    def record(self, data):
+        """
+        Appends a read_decoded_data packet, an attitude frame's recovered samples go in as records of their own
+        """
+        received = time.time()
+
+        if isinstance(data, dict):
+            link = data.get("link") or {}
+            fields = {key: value for key, value in data.items() if key not in ("frame", "time", "link")}
+            self.write(data["frame"], data["time"], received, link, json.dumps(fields, separators=(",", ":")).encode())
+            return
+
+        link = data[-1]
+        for mission_time, quaternion in link.get("recovered", []):
+            self.write("attitude", mission_time, received, link, pack_quaternion(quaternion), flags=FLAG_RECOVERED, sequence=NO_SEQUENCE)
+
+        self.write("attitude", data[0], received, link, pack_quaternion(data[1]))
+
+    def write(self, kind: str, mission_time: float, received: float, link: dict, payload: bytes, flags: int = 0, sequence: int = None):
+        if sequence is None:
+            sequence = link.get("sequence")
+        address, rssi, snr = link.get("address"), link.get("rssi"), link.get("snr")
+        address = NO_ADDRESS if address is None else address
+
+        if address not in self.indexes:
+            self.indexes[address] = AddressIndex(index_path(self.path, address))
+        index = self.indexes[address]
+        index.before(self.offset)
+
+        record = struct.pack(
+            HEADER, len(payload), RECORD_KINDS.index(kind), flags, address,
+            NO_SEQUENCE if sequence is None else sequence,
+            mission_time, received,
+            NO_RSSI if rssi is None else max(-32767, min(32767, rssi)),
+            NO_SNR if snr is None else max(-127, min(127, snr)),
+        ) + payload
+
+        self.data.write(record)
+        self.offset += len(record)
+        self.records += 1
+
+        index.after(mission_time)
+
+    def close(self):
+        for file in [self.data] + [index.file for index in self.indexes.values()]:
+            os.fsync(file.fileno())
+            file.close()
+
+class TelemetryReader:
+    """
+    Reads a recording while it's still being written (from another process too), sees every complete record so far
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    def addresses(self) -> list:
+        """
+        Every sender address in the recording so far (NO_ADDRESS for records whose address couldn't be read)
+        """
+        base = os.path.splitext(self.path)[0]
+        found = []
+        for path in glob.glob(glob.escape(base) + ".*.idx"):
+            try:
+                found.append(int(path[len(base) + 1:-len(".idx")]))
+            except ValueError:
+                continue
+        return sorted(found)
+
+    def start_offset(self, start: float, address: int) -> int:
+        """
+        Offset of the last index entry with all of address's records before it older than start,
+        O(log n) seeks into the address's index
+        """
+        try:
+            index = open(index_path(self.path, address), "rb")
+        except FileNotFoundError:
+            return 0
+
+        with index:
+            low, high = 0, os.fstat(index.fileno()).st_size // INDEX_ENTRY_SIZE
+            offset = 0
+
+            while low < high:
+                mid = (low + high) // 2
+                index.seek(mid * INDEX_ENTRY_SIZE)
+                newest, entry_offset = struct.unpack(INDEX_ENTRY, index.read(INDEX_ENTRY_SIZE))
+
+                if newest < start:
+                    offset = entry_offset
+                    low = mid + 1
+                else:
+                    high = mid
+
+            return offset
+
+    def range(self, start: float = None, end: float = None, kinds: list = None, address: int = None) -> list:
+        """
+        Records with start <= mission time <= end (None: unbounded), in arrival order, optionally only of kinds
+        or from one sender address. Each is {"kind", "time", "received", "address", "sequence", "rssi", "snr", "recovered"}
+        plus the payload's fields, "quaternion" [w, x, y, z] for attitude.
+
+        Mission times are per sender, a range of every address is each address's range, merged back in arrival order.
+        """
+        if address is not None:
+            return [record for _, record in self._range(start, end, kinds, address)]
+
+        merged = []
+        for each in self.addresses():
+            merged.extend(self._range(start, end, kinds, each))
+        merged.sort(key=lambda entry: entry[0])
+        return [record for _, record in merged]
+
+    def _range(self, start, end, kinds, address: int) -> list:
+        """
+        [(offset, record), ...] of one address
+        """
+        records = []
+        newest = None
+
+        try:
+            data = open(self.path, "rb")
+        except FileNotFoundError:
+            return records
+
+        with data:
+            offset = 0 if start is None else self.start_offset(start, address)
+            data.seek(offset)
+
+            while True:
+                header = data.read(HEADER_SIZE)
+                if len(header) < HEADER_SIZE:
+                    break
+
+                length, kind, flags, record_address, sequence, mission_time, received, rssi, snr = struct.unpack(HEADER, header)
+                payload = data.read(length)
+                if len(payload) < length: #torn record at the end
+                    break
+
+                record_offset = offset
+                offset += HEADER_SIZE + length
+
+                if record_address != address:
+                    continue
+
+                if newest is None or mission_time > newest:
+                    newest = mission_time
+                if end is not None and newest > end + REORDER_WINDOW:
+                    break
+
+                if (start is not None and mission_time < start) or (end is not None and mission_time > end):
+                    continue
+                if kinds is not None and RECORD_KINDS[kind] not in kinds:
+                    continue
+
+                record = {
+                    "kind": RECORD_KINDS[kind],
+                    "time": mission_time,
+                    "received": received,
+                    "address": None if record_address == NO_ADDRESS else record_address,
+                    "sequence": None if sequence == NO_SEQUENCE else sequence,
+                    "rssi": None if rssi == NO_RSSI else rssi,
+                    "snr": None if snr == NO_SNR else snr,
+                    "recovered": bool(flags & FLAG_RECOVERED),
+                }
+
+                if RECORD_KINDS[kind] == "attitude":
+                    record["quaternion"] = list(struct.unpack(">4f", payload))
+                else:
+                    record.update(json.loads(payload))
+
+                records.append((record_offset, record))
+
+        return records
+
+def pack_quaternion(quaternion: dict) -> bytes:
+    return struct.pack(">4f", quaternion["rotation_w"], quaternion["rotation_x"], quaternion["rotation_y"], quaternion["rotation_z"])
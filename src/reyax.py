@@ -1,5 +1,6 @@
 import serial
-import time, struct
+import time, struct, math
+from collections import deque
 
 #OTHER METRICS
 def getStartMessage():
@@ -11,27 +12,254 @@ def getNumQuaternions() -> int:
     """
     return 1
 
-def getPackFormat():
+def getRedundancy() -> int:
+    """
+    How many previous samples every frame piggybacks (6 bytes each) so the ground can backfill lost packets.
+    0 sends plain frames, K recovers bursts of up to K lost packets in a row. Only the transmitter reads this,
+    the receiver works the count out from the frame length.
+    """
+    return 0
+
+REDUNDANT_SAMPLE_FORMAT = "Hbbbb" #ms before the frame's mission time, int8 (w, x, y, z)
+
+def getPackFormat(redundancy: int = 0):
     #msb <- lsb
-    #h : 2-byte short
-    #1 short for time_delta, size = 2-bytes * 4 num on the rest for n=0 -> n=8 (w_n,x_n,y_n,z_n)
-    return ">h" + ("hhhh" * getNumQuaternions())
+    #B : 1-byte unsigned char, I : 4-byte unsigned int, h : 2-byte short, H : 2-byte unsigned short, b : 1-byte signed char
+    #1 uchar frame type (FRAME_ATTITUDE), 1 uchar rolling sequence number, 1 uint mission time (ms),
+    #size = 2-bytes * 4 num on the rest for n=0 -> n=8 (w_n,x_n,y_n,z_n), then redundancy previous samples, newest first
+    return ">BBI" + ("hhhh" * getNumQuaternions()) + (REDUNDANT_SAMPLE_FORMAT * redundancy)
+
+#sequence numbers skip the line terminator bytes, so the counter can never end a +RCV line early
+SEQUENCE_VALUES = [value for value in range(256) if value not in b"\r\n"]
+SEQUENCE_MODULUS = len(SEQUENCE_VALUES) #254 numbers before the 1 byte counter wraps
+SEQUENCE_POSITION = {value: position for position, value in enumerate(SEQUENCE_VALUES)}
+MISSION_TIME_MODULUS = 2**32 #mission time wraps at 4 bytes of milliseconds (~49.7 days)
+
+def next_sequence(sequence: int) -> int:
+    return SEQUENCE_VALUES[(SEQUENCE_POSITION[sequence] + 1) % SEQUENCE_MODULUS]
+
+def sequence_gap(sequence: int, last_sequence: int):
+    """
+    Frames sent from last_sequence to sequence (1: back to back, 0: duplicate), None if either isn't a sequence number
+    """
+    if sequence not in SEQUENCE_POSITION or last_sequence not in SEQUENCE_POSITION:
+        return None
+    return (SEQUENCE_POSITION[sequence] - SEQUENCE_POSITION[last_sequence]) % SEQUENCE_MODULUS
+
+#MISSION TIME (EN/DE)CODING
+
+def mission_time_to_uint(mission_time):
+    """
+    Converts seconds since the start signal to a wrapping unsigned 32-bit millisecond counter.
+    Absolute (not a delta), so a lost packet never shifts the timeline of the ones after it.
+    """
+    return int(round(mission_time * 1000)) % MISSION_TIME_MODULUS
+
+MISSION_TIME_RESET = 2000 #ms, a jump further back than this (short of a wrap) is the sender restarting its clock
+
+class MissionClock:
+    """
+    Receiver side of mission_time_to_uint: unwraps the counter back to continuous seconds on the sender's clock.
+
+    A flight computer reboot starts its counter over at ~0. That bumps the epoch and re-anchors the clock on the newest
+    time seen, so the new epoch's times carry on from there instead of landing behind everything already received.
+    Only frames stamped as they're sent (attitude, altitude) can tell a restart; events & health are stamped with
+    when they happened (landing 5 s back) and are unwrapped against the clock without moving it.
+    """
+    def __init__(self):
+        self.last_raw = None
+        self.wraps = 0
+        self.epoch = 0 #sender restarts seen
+        self.base = 0.0 #seconds added to the current epoch's times
+        self.newest = 0.0
+
+    def unwrap(self, raw: int, current: bool = True) -> float:
+        """
+        current: the frame was stamped when it was sent, False for ones stamped in the past
+        """
+        half = MISSION_TIME_MODULUS // 2
+
+        if not current:
+            wraps = self.wraps
+            if self.last_raw is not None and raw < self.last_raw - half: #after a wrap the clock hasn't seen yet
+                wraps += 1
+            elif self.last_raw is not None and raw > self.last_raw + half: #from before the last wrap
+                wraps -= 1
+            return self.base + (wraps * MISSION_TIME_MODULUS + raw) / 1000.0
+
+        if self.last_raw is not None:
+            if raw < self.last_raw and self.last_raw - raw > half: #counter wrapped since the last packet
+                self.wraps += 1
+            elif raw < self.last_raw and self.last_raw - raw > MISSION_TIME_RESET: #sender restarted
+                self.epoch += 1
+                self.base = self.newest
+                self.wraps = 0
+            elif raw > self.last_raw and raw - self.last_raw > half: #late packet from before the last wrap
+                return self.base + ((self.wraps - 1) * MISSION_TIME_MODULUS + raw) / 1000.0
+
+        self.last_raw = raw
+        mission_time = self.base + (self.wraps * MISSION_TIME_MODULUS + raw) / 1000.0
+        self.newest = max(self.newest, mission_time)
+        return mission_time
+
+#CONTROL MESSAGES (ground -> rocket, acked by the rocket)
+
+def getAckMessage():
+    return "ba"
+
+CONTROL_COMMANDS = ("start", "rezero", "rate")
+
+def encode_control(command_id: int, command: str, argument=None) -> str:
+    """
+    bc|<command_id>|<command>|<argument>, command_id rolls over at 256 so retransmissions can be told apart
+    """
+    return f"{getStartMessage()}|{command_id}|{command}|{'' if argument is None else argument}"
+
+def decode_control(data: str):
+    """
+    (command_id, command, argument) of an encode_control message, argument is a string or None, None if it isn't one
+    """
+    fields = data.split("|")
+    if len(fields) != 4 or fields[0] != getStartMessage() or fields[2] not in CONTROL_COMMANDS:
+        return None
+
+    try:
+        return int(fields[1]), fields[2], fields[3] or None
+    except ValueError:
+        return None
+
+MIN_SAMPLE_RATE, MAX_SAMPLE_RATE = 1.0, 200.0 #Hz a "rate" command is clamped to
+
+def check_control(command: str, argument):
+    """
+    (status, argument) the rocket acks a control message with before running it:
+    "ok", "clamped" (a rate pulled into MIN_SAMPLE_RATE..MAX_SAMPLE_RATE) or "rejected" (not run), argument parsed
+    """
+    if command not in ("start", "rate"): #"rezero" takes no argument
+        return "ok", argument
+
+    try:
+        value = float(argument)
+    except (TypeError, ValueError):
+        return "rejected", None
+
+    if not math.isfinite(value) or value <= 0: #nan, inf & negatives would kill the logging loop
+        return "rejected", None
+
+    if command == "rate":
+        clamped = min(max(value, MIN_SAMPLE_RATE), MAX_SAMPLE_RATE)
+        return "ok" if clamped == value else "clamped", clamped
+
+    return "ok", value #sea level pressure
+
+def encode_ack(command_id: int, status: str = "ok") -> str:
+    return f"{getAckMessage()}|{command_id}|{status}"
+
+def decode_ack(data: str):
+    """
+    (command_id, status) of an encode_ack message, None if it isn't one
+    """
+    fields = data.split("|")
+    if len(fields) != 3 or fields[0] != getAckMessage():
+        return None
+
+    try:
+        return int(fields[1]), fields[2]
+    except ValueError:
+        return None
+
+#TYPED FRAMES (rocket -> ground), the first byte says which kind, see downlink.py for how they're scheduled
+#type bytes stay below 0x20 so they can't be mistaken for the text control & ack messages ("bc|", "ba|")
+
+FRAME_ATTITUDE = 0x01 #getPackFormat
+FRAME_ALTITUDE = 0x02 #ALTITUDE_FORMAT
+FRAME_HEALTH = 0x03 #HEALTH_FORMAT
+FRAME_EVENT = 0x04 #EVENT_FORMAT
+
+FRAME_KINDS = {
+    FRAME_ATTITUDE: "attitude",
+    FRAME_ALTITUDE: "altitude",
+    FRAME_HEALTH: "health",
+    FRAME_EVENT: "event",
+}
+
+#type, mission time (ms), altitude (m), barometric vertical velocity (m/s), vertical linear acceleration (cm/s^2)
+ALTITUDE_FORMAT = ">BIffh"
+#type, mission time (ms), BNO055 calibration (2 bits each, system|gyro|accel|mag), BNO055 temperature (C),
+#sample rate (Hz), frames the scheduler dropped as superseded (wraps at 2**16)
+HEALTH_FORMAT = ">BIBbHH"
+#type, mission time (ms), event index into EVENT_NAMES, altitude (m, NaN if unknown)
+EVENT_FORMAT = ">BIBf"
+
+EVENT_NAMES = ("launch", "burnout", "apogee", "landing") #events.FlightEventDetector
+EVENT_REPEATS = 3 #no acks for telemetry, each event goes out this many times & the ground de-duplicates
+
+def clip(value: int, low: int, high: int) -> int:
+    return max(low, min(high, value))
+
+def is_number(value) -> bool:
+    return isinstance(value, (int, float)) and value == value #NaN != NaN
+
+def encode_altitude(mission_time: float, altitude, velocity, acceleration) -> bytes:
+    return struct.pack(
+        ALTITUDE_FORMAT, FRAME_ALTITUDE, mission_time_to_uint(mission_time),
+        altitude if is_number(altitude) else float("nan"),
+        velocity if is_number(velocity) else float("nan"),
+        clip(int(round(acceleration * 100)), -32768, 32767) if is_number(acceleration) else 0,
+    )
+
+def decode_altitude(frame: bytes):
+    """
+    (mission time ms, altitude or None, velocity or None, acceleration) of an encode_altitude frame
+    """
+    _, raw_time, altitude, velocity, acceleration = struct.unpack(ALTITUDE_FORMAT, frame)
+    return raw_time, round(altitude, 2) if is_number(altitude) else None, round(velocity, 2) if is_number(velocity) else None, acceleration / 100.0
+
+def encode_health(mission_time: float, health: dict) -> bytes:
+    """
+    health: {"calibration" (calibration.calibration_status), "temperature", "rate", "dropped"}
+    """
+    calibration = health.get("calibration") or {}
+    packed = 0
+    for sensor in ("system", "gyro", "accel", "mag"):
+        packed = (packed << 2) | (clip(int(calibration.get(sensor, 0)), 0, 3))
 
-#TIME DELTA (EN/DE)CODING
+    temperature = health.get("temperature")
 
-def time_delta_to_short(time_delta):
+    return struct.pack(
+        HEALTH_FORMAT, FRAME_HEALTH, mission_time_to_uint(mission_time), packed,
+        clip(int(temperature), -128, 127) if is_number(temperature) else -128,
+        clip(int(round(health.get("rate", 0))), 0, 65535),
+        health.get("dropped", 0) % 65536,
+    )
+
+def decode_health(frame: bytes):
+    """
+    (mission time ms, health dict) of an encode_health frame, calibration in calibration.calibration_status's shape
+    """
+    _, raw_time, packed, temperature, rate, dropped = struct.unpack(HEALTH_FORMAT, frame)
+
+    system, gyro, accel, mag = (packed >> 6) & 3, (packed >> 4) & 3, (packed >> 2) & 3, packed & 3
+    calibration = {"system": system, "gyro": gyro, "accel": accel, "mag": mag, "calibrated": system == gyro == accel == mag == 3}
+
+    return raw_time, {"calibration": calibration, "temperature": None if temperature == -128 else temperature, "rate": rate, "dropped": dropped}
+
+def encode_event(event: dict) -> bytes:
     """
-    Converts a time_delta with 3 decimal places to a signed 16-bit short.
-    The input time_delta must be in seconds and within the range [-32.768, 32.767].
+    A FRAME_EVENT for an events.FlightEventDetector event
     """
-    scaled = int(round(time_delta * 1000))  # Scale
-    return max(-32768, min(32767, scaled))  # Clip to 16-bit short range
+    altitude = event.get("altitude")
+    return struct.pack(EVENT_FORMAT, FRAME_EVENT, mission_time_to_uint(event["time"]), EVENT_NAMES.index(event["event"]), altitude if is_number(altitude) else float("nan"))
 
-def short_to_time_delta(short_value):
+def decode_event(frame: bytes):
     """
-    Converts a signed 16-bit short back to a time_delta with 2 decimal places.
+    (event, mission time ms, altitude or None) of an encode_event frame, None for an unknown event
     """
-    return short_value / 1000.0  # Convert back to seconds
+    _, raw_time, index, altitude = struct.unpack(EVENT_FORMAT, frame)
+    if index >= len(EVENT_NAMES):
+        return None
+
+    return EVENT_NAMES[index], raw_time, round(altitude, 1) if is_number(altitude) else None
 
 #QUATERNION (EN/DE)CODING
 
@@ -57,6 +285,80 @@ def short_to_quaternion(w_short, x_short, y_short, z_short):
     scale_factor = 32767.0  # Max value for scaling
     return [x / scale_factor for x in (w_short, x_short, y_short, z_short)]
 
+def quaternion_to_byte(w, x, y, z):
+    """
+    Coarse 8-bit version of quaternion_to_short for redundant copies, ~0.5 degree resolution
+    """
+    return [max(-127, min(127, int(round(value * 127)))) for value in (w, x, y, z)]
+
+def byte_to_quaternion(w_byte, x_byte, y_byte, z_byte):
+    """
+    Inverse of quaternion_to_byte, renormalized since the rounding error is large enough to matter
+    """
+    norm = (w_byte**2 + x_byte**2 + y_byte**2 + z_byte**2) ** 0.5 or 1.0
+    return [value / norm for value in (w_byte, x_byte, y_byte, z_byte)]
+
+def as_quaternion_dict(quaternion: list) -> dict:
+    return {
+        "rotation_w" : quaternion[0],
+        "rotation_x" : quaternion[1],
+        "rotation_y" : quaternion[2],
+        "rotation_z" : quaternion[3],
+    }
+
+#AT COMMAND ENGINE
+
+AT_DEADLINE = 0.5 #seconds a command gets to answer +OK/+ERR before it counts as unanswered
+AT_DEADLINES = {
+    "AT+RESET": 3.0, #+READY once the module has rebooted
+    "AT+SEND": 1.0, #+OK once the frame is on the air
+}
+
+READ_SLICE = 0.05 #serial read timeout, set once on the port, a blocking read checks its own deadline this often
+DRAIN_QUIET = 0.2 #seconds without a line before late answers of a failed pipelined batch count as drained
+
+def command_deadline(command: str) -> float:
+    return AT_DEADLINES.get(command.split("=", 1)[0], AT_DEADLINE)
+
+def is_final_token(command: str, line: str) -> bool:
+    """
+    Whether line is the module's last word on command: +ERR=<code> for anything, +READY for a reset,
+    +<NAME>=<value> for a query (AT+...?) and +OK for everything else
+    """
+    if line.startswith("+ERR"):
+        return True
+    if command.startswith("AT+RESET"):
+        return line.startswith("+READY")
+    if command.endswith("?"):
+        return line.startswith("+")
+    return line.startswith("+OK")
+
+MAX_PAYLOAD = 240 #bytes of <Data> the module can carry
+
+def line_end(buffer: bytes):
+    """
+    Index just past the first full line in buffer, None if it isn't all there yet.
+    A +RCV line's binary <Data> can hold a b'\n' of its own, so its newline is only looked for past <Length> bytes of it.
+    """
+    start = 0
+
+    if buffer.startswith(b'+RCV='):
+        fields = buffer.split(b',', 2)
+        header = len(fields[0]) + len(fields[1]) + 2 if len(fields) == 3 else None
+
+        if header is None or b'\n' in buffer[:header]: #header not all in yet, or a garbled one
+            start = 0 if b'\n' in buffer else len(buffer)
+        else:
+            try:
+                length = int(fields[1])
+            except ValueError:
+                length = None
+            if length is not None and 0 <= length <= MAX_PAYLOAD:
+                start = header + length
+
+    newline = buffer.find(b'\n', start)
+    return None if newline < 0 else newline + 1
+
 #TRANSMISSION DRIVER
 
 class RYLR998:
@@ -64,79 +366,147 @@ class RYLR998:
         """
         Initialize the serial connection and configure the module's address and network ID if provided.
         """
-        
-        #all sleeps are threaded in setup_hardware on RPI02W.py
 
-        self.ser = serial.Serial(port=port, baudrate=baudrate, timeout=timeout)
-        time.sleep(1)  # Allow time for the serial connection to initialize
+        #the port's own timeout never changes after this (every change is a tcsetattr), reads wait in READ_SLICE steps
+        self.ser = serial.Serial(port=port, baudrate=baudrate, timeout=READ_SLICE)
+        self.port_timeout = timeout #default wait of read_line
+        self.rx = b'' #bytes read off the port that don't make up a full line yet
+        self.corrupt_frames = 0 #+RCV lines that couldn't be decoded, reported with every packet
+        #per sender <Address>, several transmitters can share the network
+        self.mission_clocks = {} #unwraps each sender's mission time stamps
+        self.last_sequences = {} #for backfilling lost frames from the redundant copies in the next one
+        self.unsolicited = deque(maxlen=64) #+RCV lines that turned up while waiting on an AT response
+        self.acks = {} #(address, command_id) -> status of control acks received, see RYLR998_Recieve.send_control
 
-        self.send_command("AT+RESET")
-        time.sleep(2) #Allow time for reset
+        #returns on +READY, as soon as the module is back up
+        print("AT+RESET", self.send_command("AT+RESET")["response"], flush=True)
 
-        # Set configurations to optimal rocket telemetry settings
-        self.configure_module()
-        
-        # Configure network ID if provided
-        if network_id is not None:
-            print("\nsetting NWID", flush=True)
-            self.set_network_id(network_id)
-        
-        # Configure address if provided
-        if address is not None:
-            print("\nsetting ADDR", flush=True)
-            self.set_address(address)
+        # Set configurations to optimal rocket telemetry settings, network ID & address if provided
+        self.configure_module(network_id, address)
 
-    def configure_module(self):
+    def configure_module(self, network_id=None, address=None):
         """
-        Configure the module with hardcoded settings optimal for rocket telemetry
+        Configure the module with hardcoded settings optimal for rocket telemetry, pipelined since none depend on each other
         """
 
         print("Configuring RYLR998...")
 
-        #Spreading Factor, 9=500kz bw, 2=cr 4/6
-        print("AT+PARAMETER", self.send_command('AT+PARAMETER=7,9,2,12'), flush=True)
-
-        # Frequency band: 915 MHz
-        print("AT+BAND", self.send_command('AT+BAND=915000000'), flush=True)
+        commands = [
+            'AT+PARAMETER=7,9,2,12', #Spreading Factor, 9=500kz bw, 2=cr 4/6
+            'AT+BAND=915000000', # Frequency band: 915 MHz
+            'AT+MODE=0', #transmit IMMEDIATELY
+            'AT+CRFOP=20', # Transmission power:  20dBm
+        ]
+        if network_id is not None:
+            commands.append(f"AT+NETWORKID={network_id}")
+        if address is not None:
+            commands.append(f"AT+ADDRESS={address}")
 
-        print("AT+MODE", self.send_command('AT+MODE=0'), flush=True) #transmit IMMEDIATELY
+        for result in self.send_commands(commands):
+            print(result["command"], result["response"], flush=True)
 
-        # Transmission power:  20dBm
-        print("AT+CRFOP", self.send_command('AT+CRFOP=20'), flush=True)
+            if result["ok"] and result["command"].startswith("AT+NETWORKID="):
+                self.network_id = network_id
+            elif result["ok"] and result["command"].startswith("AT+ADDRESS="):
+                self.address = address
 
         print("Config complete.")
-    
-    def send_command(self, command, retry=1):
+
+    def write_command(self, command: str, data: bytes = b''):
+        self.ser.write(command.encode() + data + b'\r\n')
+
+    def await_result(self, command: str) -> dict:
         """
-        Send an AT command and return the response.
+        Reads the port until command's final token (see is_final_token) or its deadline (see AT_DEADLINES).
+
+        returns {"command", "ok", "response" (the final token line, None if it never came),
+                 "lines" (anything else the module said), "elapsed" (seconds)}
         """
-        
-        full_command = f'{command}\r\n'
-        self.ser.write(full_command.encode())
-        time.sleep(0.05)
-        response = ''
+        started = time.monotonic()
+        deadline = started + command_deadline(command)
+        lines = []
 
         while True:
-            if self.ser.in_waiting:
-                try:
-                    response += self.ser.read(self.ser.in_waiting).decode()
-                except UnicodeDecodeError: # race condition, skip over as it will be handled in correct scope if ignored
-                    print(f"Tried to decode: {response}, doesn't follow UTF-8 Codec in scope REYAX:send_command, continuing", flush=True)
-                    continue
+            line = self.read_port_line(deadline)
+
+            if not line: #deadline passed
+                return {"command": command, "ok": False, "response": None, "lines": lines, "elapsed": round(time.monotonic() - started, 4)}
+
+            if line.startswith(b'+RCV='): #a frame landed mid-command, keep it for read_line
+                self.unsolicited.append(line)
+                continue
+
+            text = line.decode(errors="replace").strip()
+            if not text:
+                continue
+
+            if is_final_token(command, text):
+                return {"command": command, "ok": not text.startswith("+ERR"), "response": text, "lines": lines, "elapsed": round(time.monotonic() - started, 4)}
+
+            lines.append(text)
 
-                if 'OK' in response or 'ERROR' in response:
-                    break
-            else:
+    def send_command(self, command: str, retries: int = 1) -> dict:
+        """
+        Send an AT command and wait on its answer, resent up to retries more times if it errors or times out.
+        Returns the last attempt's await_result, plus "attempts".
+        """
+        for attempt in range(retries + 1):
+            self.write_command(command)
+            result = self.await_result(command)
+            result["attempts"] = attempt + 1
+
+            if result["ok"]:
                 break
 
-        response = response.strip()
-        if 'ERROR' in response:
-            print(f"ERROR running command {command}: {response}, retrying {retry} more times", flush=True)  
-            self.send_command(command, retry-1)
+            print(f"ERROR running command {command}: {result['response']}, retrying {retries - attempt} more times", flush=True)
+
+        return result
+
+    def send_commands(self, commands: list) -> list:
+        """
+        Pipelines independent (idempotent) commands: all written back to back, answers matched to them in order.
+        One missing answer means the pairing can't be trusted, so then the whole batch goes again one at a time.
+        Anything that errored is retried on its own.
+        """
+        for command in commands:
+            self.write_command(command)
+
+        results = []
+        for index, command in enumerate(commands):
+            result = self.await_result(command)
+            result["attempts"] = 1
+
+            if result["response"] is None:
+                #the rest of the batch may still answer, those +OKs would be paired with the resent commands
+                self.drain(DRAIN_QUIET, max(map(command_deadline, commands[index:])))
+                return [self.send_command(command) for command in commands]
+            results.append(result)
+
+        for index, result in enumerate(results):
+            if not result["ok"]:
+                results[index] = self.send_command(result["command"], retries=0)
+
+        return results
+
+    def drain(self, quiet: float, limit: float) -> list:
+        """
+        Throws away AT answers until the module has been quiet for quiet seconds (at most limit), returns them.
+        +RCV lines are kept for read_line.
+        """
+        deadline = time.monotonic() + limit
+        dropped = []
+
+        while True:
+            line = self.read_port_line(min(deadline, time.monotonic() + quiet))
+            if not line:
+                return dropped
 
-        return response
+            if line.startswith(b'+RCV='):
+                self.unsolicited.append(line)
+            elif line.strip():
+                dropped.append(line.decode(errors="replace").strip())
 
-    def read_decoded_data(self) -> dict:
+    def read_decoded_data(self, timeout: float = None) -> dict:
         """
         DATA FORMAT: +RCV=<Address>,<Length>,<Data>,<RSSI>,<SNR>
         
@@ -151,139 +521,292 @@ class RYLR998:
         2) decode bytes wt UTF-8 l->r until you match 2 "," | save end_index = index
         3) telemetry_payload = struct.unpack(getPackFormat(), response[start_index:end_index])
         4) format payload to dict & / getMultiplicativeFactor()
-        5) voila!
+        5) voila! [mission_time, quaternion_0, ..., quaternion_n, link] where mission_time is seconds on the sender's clock and link is
+           {"sequence", "address", "rssi", "snr", "corrupt" (running count of undecodable frames), "arrival",
+            "epoch" (times the sender restarted its mission clock, see MissionClock),
+            "recovered" ([(mission_time, quaternion), ...] of lost frames rebuilt from this one's redundant copies, oldest first)}
+           mission time, sequence & recovery are tracked per <Address>, link["address"] says which transmitter it's from
+
+        The first byte of <Data> is the frame type (FRAME_KINDS), only FRAME_ATTITUDE comes back as the list above,
+        the others come back as a dict with "frame" (the kind), "time" (mission time, s) and "link" (without a sequence), see decode_typed_frame.
+        Control acks (ba|<command_id>|<status>) are recorded in self.acks and return None right away.
+
+        timeout: seconds to wait for a valid packet before returning None, None waits forever
         """
 
         payload = []
+        deadline = None if timeout is None else time.monotonic() + timeout
 
         while True:
-            if self.ser.in_waiting:
-                response = self.ser.readline()
+            if deadline is not None and time.monotonic() > deadline:
+                return None
 
-                if response:
+            response = self.read_line(None if deadline is None else deadline - time.monotonic()) #blocks on the port, no spinning
 
-                    start_index, end_index = 0, 0
-                    
-                    #1
-                    comma_ct1 = 0
-                    cur_index = 0
-                    for byte in response: #type(byte) is int
-                        if byte == ord(','):
-                            comma_ct1 += 1
-                        if comma_ct1 == 2:
-                            start_index = cur_index + 1
-                            break
-                        cur_index += 1
+            if response:
+
+                start_index, end_index = 0, 0
+                
+                #1
+                comma_ct1 = 0
+                cur_index = 0
+                for byte in response: #type(byte) is int
+                    if byte == ord(','):
+                        comma_ct1 += 1
+                    if comma_ct1 == 2:
+                        start_index = cur_index + 1
+                        break
+                    cur_index += 1
+                
+                #2
+                comma_ct2 = 0
+                cur_index = 0
+                for byte in response[::-1]:
+                    if byte == ord(','):
+                        comma_ct2 += 1
+                    if comma_ct2 == 2:
+                        end_index = len(response) - cur_index - 1
+                        break
+                    cur_index += 1     
+
+                if comma_ct1 != 2 or comma_ct2 != 2:
+                    print(f"ERROR, cc1:{comma_ct1}, cc2:{comma_ct2}, payload: {response}", flush=True)
+                    self.corrupt_frames += 1
+                    continue
+                
+                elif start_index >= end_index:
+                    print(f"No data found in response: {response}")
+                    self.corrupt_frames += 1
+                    continue
+
+                frame = response[start_index:end_index]
+                link = self.parse_link_fields(response, None)
+
+                if frame.startswith(getAckMessage().encode() + b"|"):
+                    ack = decode_ack(frame.decode(errors="replace"))
+                    if ack is not None:
+                        self.acks[(link["address"], ack[0])] = ack[1]
+                        return None
+
+                kind = FRAME_KINDS.get(frame[0])
+
+                #3
+                try:
+                    if kind is None:
+                        raise struct.error(f"unpack of unknown frame type {frame[0]}")
+
+                    if kind != "attitude":
+                        decoded = self.decode_typed_frame(kind, frame, link)
+                        if decoded is None:
+                            raise struct.error("unpack of an unknown event")
+                        return decoded
+
+                    extra = len(frame) - struct.calcsize(getPackFormat())
+                    redundancy, remainder = divmod(extra, struct.calcsize(">" + REDUNDANT_SAMPLE_FORMAT))
+
+                    if extra < 0 or remainder:
+                        raise struct.error("unpack requires a frame of a known size")
+
+                    data = struct.unpack(getPackFormat(redundancy), frame)
                     
-                    #2
-                    comma_ct2 = 0
-                    cur_index = 0
-                    for byte in response[::-1]:
-                        if byte == ord(','):
-                            comma_ct2 += 1
-                        if comma_ct2 == 2:
-                            end_index = len(response) - cur_index - 1
-                            break
-                        cur_index += 1     
-
-                    if comma_ct1 != 2 or comma_ct2 != 2:
-                        print(f"ERROR, cc1:{comma_ct1}, cc2:{comma_ct2}, payload: {response}", flush=True)
+                except Exception as e:
+                    self.corrupt_frames += 1
+
+                    if "unpack" in str(e):
+                        print("Error with package size (likely corruption), continuing as normal...", flush=True)
                         continue
-                    
-                    elif start_index == end_index:
-                        print(f"No data found in response: {response}")
+                    else:
+                        print(f"Unkown Error in Reyax.py READ_DECODED_DATA, {e}, continuing as normal", flush=True)
                         continue
 
-                    #3
-                    try:
-                        data = struct.unpack(getPackFormat(), response[start_index:end_index])
-                        
-                    except Exception as e:
-                        if "unpack" in str(e):
-                            print("Error with package size (likely corruption), continuing as normal...", flush=True)
-                            continue
-                        else:
-                            print(f"Unkown Error in Reyax.py READ_DECODED_DATA, {e}, continuing as normal", flush=True)
-                            continue
-
-                    #4                    
-                    payload.append(short_to_time_delta(data[0])) #time_delta
-                    for i in range(1, len(data), 4): #(w_n, x_n, y_n, z_n)
-                        quaternion = short_to_quaternion(data[i], data[i+1], data[i+2], data[i+3])
-                        payload.append({
-                            "rotation_w" : quaternion[0],
-                            "rotation_x" : quaternion[1],
-                            "rotation_y" : quaternion[2],
-                            "rotation_z" : quaternion[3],
-                        })
-                    
-                    #5!
-                    return payload
-                
-                elif response:
-                    print(f"Bad response to gyro-decode: {response.decode()}", flush=True)
+                #4                    
+                mission_time = self.unwrap_mission_time(data[2], link)
+                copies_start = 3 + 4 * getNumQuaternions()
+
+                payload.append(mission_time)
+                for i in range(3, copies_start, 4): #(w_n, x_n, y_n, z_n)
+                    payload.append(as_quaternion_dict(short_to_quaternion(data[i], data[i+1], data[i+2], data[i+3])))
+
+                copies = [] #newest first, copies[k] is frame sequence - (k + 1)
+                for i in range(copies_start, len(data), 5): #(offset_ms, w_n, x_n, y_n, z_n)
+                    copies.append((mission_time - data[i] / 1000.0, as_quaternion_dict(byte_to_quaternion(*data[i+1:i+5]))))
+
+                link["sequence"] = data[1]
+                link["recovered"] = self.recover_lost(data[1], copies, link["address"])
+                payload.append(link)
+
+                #5!
+                return payload
+            
+            elif response:
+                print(f"Bad response to gyro-decode: {response.decode()}", flush=True)
 
-        #TODO should sleep?
+    def mission_clock(self, address) -> MissionClock:
+        if address not in self.mission_clocks:
+            self.mission_clocks[address] = MissionClock()
+        return self.mission_clocks[address]
 
-    def send_data(self, data: bytes, dataSize: int, recipient_address: int = 2):
+    def unwrap_mission_time(self, raw: int, link: dict, current: bool = True) -> float:
         """
-        Send a bytestring to recipient (reciever_address=2 | RPI5) and return the response.
+        Mission time (s) of a frame from link["address"], stamps link["epoch"] so the ground can reset that sender's
+        interpolation when it restarts. A restart also starts its sequence window over.
+        current: see MissionClock.unwrap
         """
-        data = (f"AT+SEND={recipient_address},{dataSize},").encode() + data + "\r\n".encode()
-        self.ser.write(data)
+        clock = self.mission_clock(link["address"])
+        epoch = clock.epoch
+        mission_time = clock.unwrap(raw, current)
 
-        time.sleep(0.01)
-        
-        response = ''
-        while True:
-            if self.ser.in_waiting:
-                response += self.ser.read(self.ser.in_waiting).decode()
-                if 'OK' in response or 'ERROR' in response:
-                    break
-            else:
-                break
+        if clock.epoch != epoch:
+            self.last_sequences.pop(link["address"], None)
+            print(f"Sender {link['address']} restarted its mission clock, epoch {clock.epoch}", flush=True)
+
+        link["epoch"] = clock.epoch
+        return mission_time
+
+    def decode_typed_frame(self, kind: str, frame: bytes, link: dict):
+        """
+        altitude: {"frame", "time", "altitude", "velocity", "acceleration", "link"}
+        health:   {"frame", "time", "calibration", "temperature", "rate", "dropped", "link"}
+        event:    {"frame", "time", "event", "altitude", "link"}, None for an event this end doesn't know
+        """
+        if kind == "altitude":
+            raw_time, altitude, velocity, acceleration = decode_altitude(frame)
+            decoded = {"altitude": altitude, "velocity": velocity, "acceleration": acceleration}
+        elif kind == "health":
+            raw_time, decoded = decode_health(frame)
+        else:
+            event = decode_event(frame)
+            if event is None:
+                return None
+            name, raw_time, altitude = event
+            decoded = {"event": name, "altitude": altitude}
+
+        #only altitude frames are stamped as they're sent, events & health can be seconds old, see MissionClock
+        return {"frame": kind, "time": self.unwrap_mission_time(raw_time, link, kind == "altitude"), **decoded, "link": link}
+
+    def recover_lost(self, sequence: int, copies: list, address=None) -> list:
+        """
+        Redundant copies standing in for frames lost since the last one received from address, oldest first.
+        Copies of frames that did arrive are dropped, so nothing is delivered twice.
+        """
+        last_sequence = self.last_sequences.get(address)
+        gap = None if last_sequence is None else sequence_gap(sequence, last_sequence)
+
+        if gap != 0: #a duplicate doesn't move the window
+            self.last_sequences[address] = sequence
+
+        if gap is None or gap < 2 or gap >= SEQUENCE_MODULUS // 2: #nothing lost, or a sender restart (or unknown)
+            return []
+
+        return copies[:gap - 1][::-1]
+
+    def parse_link_fields(self, response: bytes, sequence: int) -> dict:
+        """
+        <Address> and the trailing <RSSI>,<SNR> of a +RCV line, None for anything unreadable
+        """
+        def to_int(field: bytes):
+            try:
+                return int(field.strip())
+            except ValueError:
+                return None
+
+        head = response.split(b",", 1)[0]
+        tail = response.rsplit(b",", 2)
+
+        return {
+            "sequence": sequence,
+            "address": to_int(head[len(b"+RCV="):]) if head.startswith(b"+RCV=") else None,
+            "rssi": to_int(tail[-2]) if len(tail) == 3 else None,
+            "snr": to_int(tail[-1]) if len(tail) == 3 else None,
+            "corrupt": self.corrupt_frames,
+            "arrival": time.monotonic(), #stamped as close to the radio as possible, for inter-arrival jitter
+        }
+
+    def send_data(self, data: bytes, dataSize: int, recipient_address: int = 2) -> dict:
+        """
+        Send a bytestring to recipient (reciever_address=2 | RPI5) and return the await_result of the AT+SEND.
+        """
+        command = f"AT+SEND={recipient_address},{dataSize},"
+        self.write_command(command, data)
+
+        result = self.await_result(command)
         
-        if 'ERROR' in response:
-            raise RuntimeError(f"Command failed: {data}, Response: {response}") #TODO handle for deployment
+        if result["response"] is not None and not result["ok"]:
+            raise RuntimeError(f"Command failed: {command}, Response: {result['response']}") #TODO handle for deployment
         
-        response = response.strip()
-        return response
+        return result
 
-    def pulse(self):
+    def read_port_line(self, deadline: float) -> bytes:
+        """
+        Next full line off the port, b'' if none completes by deadline (time.monotonic()).
+        Blocks in the serial read instead of polling, a partial line stays in self.rx for the next call.
+        """
+        while line_end(self.rx) is None:
+            if self.ser.in_waiting:
+                self.rx += self.ser.read(self.ser.in_waiting)
+                continue
+
+            if time.monotonic() >= deadline:
+                return b''
+
+            self.rx += self.ser.read(1) #wakes on the first byte or after READ_SLICE
+
+        end = line_end(self.rx)
+        line, self.rx = self.rx[:end], self.rx[end:]
+        return line
+
+    def read_line(self, timeout: float = None) -> bytes:
+        """
+        Next line from the module, set aside +RCV lines first, b'' if none within timeout seconds (None: the port timeout)
+        """
+        if self.unsolicited:
+            return self.unsolicited.popleft()
+        return self.read_port_line(time.monotonic() + (self.port_timeout if timeout is None else timeout))
+
+    def has_input(self) -> bool:
+        """
+        Whether read_line has something to return without waiting on the port
+        """
+        return bool(self.unsolicited or b'\n' in self.rx or self.ser.in_waiting)
+
+    def pulse(self) -> bool:
         """
         Check if the RYLR998 module is responsive by sending a basic AT command.
         Returns True if the module responds with 'OK'.
         """
-        response = self.send_command('AT')
-        return response
+        return self.send_command('AT')["ok"]
 
-    def set_network_id(self, network_id):
+    def set_network_id(self, network_id) -> dict:
         """
         Set the network ID of the module.
         """
 
         command = f"AT+NETWORKID={network_id}"
-        response = self.send_command(command)
+        result = self.send_command(command)
         
-        if 'OK' in response:
+        if result["ok"]:
             print(f"Network ID set to {network_id}", flush=True)
             self.network_id = network_id
         else:
-            print(f"Failed to set Network ID: {response}", flush=True)
+            print(f"Failed to set Network ID: {result}", flush=True)
 
-    def set_address(self, address):
+        return result
+
+    def set_address(self, address) -> dict:
         """
         Set the address of the module.
         """
         
         command = f"AT+ADDRESS={address}"
-        response = self.send_command(command)
+        result = self.send_command(command)
         
-        if 'OK' in response:
+        if result["ok"]:
             print(f"Address set to {address}", flush=True)
             self.address = address
         else:
-            print(f"Failed to set Address: {response}", flush=True)
+            print(f"Failed to set Address: {result}", flush=True)
+
+        return result
 
     def close(self):
         """
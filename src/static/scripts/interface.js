@@ -3,4 +3,53 @@ function update(w, x, y, z) {
     document.getElementById("input_data").setAttribute("x_in", x);
     document.getElementById("input_data").setAttribute("y_in", y);
     document.getElementById("input_data").setAttribute("z_in", z);
-}
\ No newline at end of file
+}
+
+// Plays out timestamped frames from "data_batch" messages at their stream times, delayed by a small
+// safety margin so late packets don't stall the animation
+class JitterBuffer {
+    constructor(delay = 0.15, capacity = 1024) {
+        this.delay = delay; // seconds of frames held back before playout
+        this.capacity = capacity;
+        this.frames = []; // [t, w, x, y, z], ordered by t
+        this.offset = null; // local clock - stream clock
+    }
+
+    push(buffer) {
+        const data = new Float32Array(buffer);
+        const now = performance.now() / 1000;
+
+        for (let i = 0; i + 4 < data.length; i += 5) {
+            this.frames.push([data[i], data[i + 1], data[i + 2], data[i + 3], data[i + 4]]);
+        }
+
+        // (re)anchor the stream clock on the first batch, or when a batch shows up after its playout time (underrun)
+        if (this.frames.length && (this.offset === null || this.frames[0][0] + this.offset < now)) {
+            this.offset = now - this.frames[0][0] + this.delay;
+        }
+
+        if (this.frames.length > this.capacity) {
+            this.frames.splice(0, this.frames.length - this.capacity);
+        }
+    }
+
+    // returns the newest frame due at local time now (seconds), or null if nothing is due
+    pop(now) {
+        if (this.offset === null) return null;
+
+        const streamNow = now - this.offset;
+        let due = 0;
+        while (due < this.frames.length && this.frames[due][0] <= streamNow) due++;
+
+        if (due === 0) return null;
+        return this.frames.splice(0, due)[due - 1];
+    }
+
+    // drops everything, the next batch re-anchors (switching to another vehicle's stream)
+    reset() {
+        this.frames = [];
+        this.offset = null;
+    }
+}
+
+const jitterBuffer = new JitterBuffer();
@@ -30,7 +30,6 @@ void main () {
   gl_FragColor = vec4(u_diffuse.rgb * fakeLight, u_diffuse.a);
 }`;
 
-const modelPath = "./static/model/rocket_edited.obj";
 const framerate = 40; // 1/10 of a second.
 
 class Quaternion {
@@ -162,14 +161,13 @@ async function main() {
     return;
   }
 
-  const response = await fetch(modelPath); //RELATIVE URL...
+  const response = await fetch(meshURL); //precompiled by meshcache.py, browser gunzips it
   
   if (!response.ok) {
     throw new Error(`Network response was not ok: ${response.status} ${response.statusText}`);
   }
   
-  const text = await response.text();
-  const data = parseOBJ(text);
+  const mesh = parseMesh(await response.arrayBuffer());
 
   // Set clear color to black, fully opaque
   gl.clearColor(0.0, 0.0, 0.0, 1.0);
@@ -177,13 +175,29 @@ async function main() {
   // Clear the color buffer with specified clear color
   gl.clear(gl.COLOR_BUFFER_BIT);
 
-  const parts = data.geometries.map(({data}) => {
-    const bufferInfo = webglUtils.createBufferInfoFromArrays(gl, data);
+  // one interleaved vertex buffer & one index buffer shared by every material
+  const vertexBuffer = gl.createBuffer();
+  gl.bindBuffer(gl.ARRAY_BUFFER, vertexBuffer);
+  gl.bufferData(gl.ARRAY_BUFFER, mesh.vertices, gl.STATIC_DRAW);
+
+  const indexBuffer = gl.createBuffer();
+  gl.bindBuffer(gl.ELEMENT_ARRAY_BUFFER, indexBuffer);
+  gl.bufferData(gl.ELEMENT_ARRAY_BUFFER, mesh.indices, gl.STATIC_DRAW);
+
+  const attribs = {};
+  for (const [name, [numComponents, offset]] of Object.entries(mesh.header.attributes)) {
+    attribs[name] = {buffer: vertexBuffer, numComponents, type: gl.FLOAT, stride: mesh.header.stride, offset};
+  }
+  const bufferInfo = {attribs, indices: indexBuffer, numElements: mesh.header.indexCount};
+
+  const parts = mesh.header.ranges.map(({diffuse, first, count}) => {
     return {
       material: {
-        u_diffuse: [Math.random(), Math.random(), Math.random(), 1],
+        u_diffuse: diffuse,
       },
       bufferInfo,
+      first,
+      count,
     };
   });
 
@@ -242,6 +256,12 @@ async function main() {
     webglUtils.setUniforms(meshProgramInfo, sharedUniforms);
     // compute the world matrix once since all parts
     // are at the same space.
+
+    // batched frames due by now replace whatever data_send wrote last
+    const frame = jitterBuffer.pop(performance.now() / 1000);
+    if (frame) {
+      update(frame[1], frame[2], frame[3], frame[4]);
+    }
         
     let tempW = Number(document.getElementById("input_data").getAttribute("w_in"));
     let tempX = Number(document.getElementById("input_data").getAttribute("x_in"));
@@ -271,7 +291,11 @@ async function main() {
     document.getElementById("yAngle").textContent = angleY;
     document.getElementById("zAngle").textContent = angleZ;
 
-    for (const {bufferInfo, material} of parts) {
+    if (frame) {
+      updateEulerDisplay();
+    }
+
+    for (const {bufferInfo, material, first, count} of parts) {
       // calls gl.bindBuffer, gl.enableVertexAttribArray, gl.vertexAttribPointer
       webglUtils.setBuffersAndAttributes(gl, meshProgramInfo, bufferInfo);
   
@@ -281,8 +305,8 @@ async function main() {
         u_diffuse: material.u_diffuse,
       });
   
-      // calls gl.drawArrays or gl.drawElements
-      webglUtils.drawBufferInfo(gl, bufferInfo);
+      // calls gl.drawElements, offset is in bytes of Uint16 indices
+      webglUtils.drawBufferInfo(gl, bufferInfo, gl.TRIANGLES, count, first * 2);
     }
     framecounter++;
     requestAnimationFrame(render);
@@ -292,151 +316,25 @@ async function main() {
 
 }
 
-function parseOBJ(text) {
-  // because indices are base 1 let's just fill in the 0th data
-  const objPositions = [[0, 0, 0]];
-  const objTexcoords = [[0, 0]];
-  const objNormals = [[0, 0, 0]];
-
-  // same order as `f` indices
-  const objVertexData = [
-    objPositions,
-    objTexcoords,
-    objNormals,
-  ];
-
-  // same order as `f` indices
-  let webglVertexData = [
-    [],   // positions
-    [],   // texcoords
-    [],   // normals
-  ];
-
-  const materialLibs = [];
-  const geometries = [];
-
-  let groups = ['default'];
-  let geometry;
-  let material = 'default';
-  let object = 'default';
- 
-  function newGeometry() {
-    // If there is an existing geometry and it's
-    // not empty then start a new one.
-    if (geometry && geometry.data.position.length) {
-      geometry = undefined;
-    }
-  }
- 
-  function setGeometry() {
-    if (!geometry) {
-      const position = [];
-      const texcoord = [];
-      const normal = [];
-      
-      webglVertexData = [
-        position,
-        texcoord,
-        normal,
-      ];
-
-      geometry = {
-        object,
-        groups,
-        material,
-        data: {
-          position,
-          texcoord,
-          normal,
-        },
-      };
-      
-      geometries.push(geometry);
-    }
-  }
+// Reads the RKM1 binary mesh written by meshcache.py: magic, uint32 header length, JSON header, Float32 vertices, Uint16 indices
+function parseMesh(buffer) {
+  const view = new DataView(buffer);
+  const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
 
-  function addVertex(vert) {
-    const ptn = vert.split('/');
-    ptn.forEach((objIndexStr, i) => {
-      if (!objIndexStr) {
-        return;
-      }
-      
-      const objIndex = parseInt(objIndexStr);
-      const index = objIndex + (objIndex >= 0 ? 0 : objVertexData[i].length);
-      webglVertexData[i].push(...objVertexData[i][index]);
-    });
+  if (magic !== "RKM1") {
+    throw new Error(`Unknown mesh format: ${magic}`);
   }
 
-  const noop = () => {};
-
-  const keywords = {
-    v(parts) {
-      setGeometry();
-      objPositions.push(parts.map(parseFloat));
-    },
-    vn(parts) {
-      objNormals.push(parts.map(parseFloat));
-    },
-    vt(parts) {
-      // should check for missing v and extra w?
-      objTexcoords.push(parts.map(parseFloat));
-    },
-    f(parts) {
-      const numTriangles = parts.length - 2;
-      for (let tri = 0; tri < numTriangles; ++tri) {
-        addVertex(parts[0]);
-        addVertex(parts[tri + 1]);
-        addVertex(parts[tri + 2]);
-      }
-    },
-    g(parts) {
-      groups = parts;
-      newGeometry()
-    },
-    s: noop,
-    mtllib(parts, unparsedArgs) {
-      materialLibs.push(unparsedArgs);
-    },
-    o(parts, unparsedArgs) {
-      object = unparsedArgs;
-      newGeometry();
-    },
-    usemtl(parts, unparsedArgs) {
-      material = unparsedArgs;
-      newGeometry();
-    },
-  };
-  
-  const keywordRE = /(\w*)(?: )*(.*)/;
-  const lines = text.split('\n');
-  for (let lineNo = 0; lineNo < lines.length; ++lineNo) {
-    const line = lines[lineNo].trim();
-    if (line === '' || line.startsWith('#')) {
-      continue;
-    }
-    const m = keywordRE.exec(line);
-    if (!m) {
-      continue;
-    }
-    const [, keyword, unparsedArgs] = m;
-    const parts = line.split(/\s+/).slice(1);
-    const handler = keywords[keyword];
-    if (!handler) {
-      console.warn('unhandled keyword:', keyword);  // eslint-disable-line no-console
-      continue;
-    }
-    handler(parts, unparsedArgs);
-  }
+  const headerLength = view.getUint32(4, true);
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+
+  const vertexOffset = 8 + headerLength;
+  const vertices = new Float32Array(buffer, vertexOffset, header.vertexCount * header.stride / 4);
+  const indices = new Uint16Array(buffer, vertexOffset + vertices.byteLength, header.indexCount);
 
-    // remove any arrays that have no entries.
-  for (const geometry of geometries) {
-    geometry.data = Object.fromEntries(
-        Object.entries(geometry.data).filter(([, array]) => array.length > 0));
-  }
- 
   return {
-    materialLibs,
-    geometries,
+    header,
+    vertices,
+    indices,
   };
-}
\ No newline at end of file
+}
@@ -0,0 +1,136 @@
+"""
+Downsampled telemetry channels for dashboard charts, read from the ground recording (recorder.py).
+
+A channel over a mission time range comes back as at most `points` [t, value] pairs, decimated with
+Largest-Triangle-Three-Buckets so peaks & dips (apogee, burnout spikes) survive the decimation.
+
+    series = TimeSeries(TelemetryReader(path))
+    series.get("altitude", start=0.0, end=None, points=500, address=1) #end None: up to the newest packet
+    series.invalidate("altitude", mission_time, address=1) #a packet of that kind just arrived from that vehicle
+
+Results are cached per (channel, start, end, points, address). A new packet only evicts the cached results whose range
+it falls in, for channels fed by its kind from its vehicle, so charts of a finished phase of the flight stay cached.
+A result whose kind & vehicle were invalidated while it was being read isn't cached, it may have missed that packet.
+"""
+
+import threading
+from collections import OrderedDict
+
+#channel -> (record kind it comes from, value of a record)
+CHANNELS = {
+    "altitude": ("altitude", lambda record: record["altitude"]),
+    "velocity": ("altitude", lambda record: record["velocity"]),
+    "acceleration": ("altitude", lambda record: record["acceleration"]),
+    "temperature": ("health", lambda record: record["temperature"]),
+    "rate": ("health", lambda record: record["rate"]),
+    "rssi": ("attitude", lambda record: record["rssi"]),
+    "snr": ("attitude", lambda record: record["snr"]),
+    "w": ("attitude", lambda record: record["quaternion"][0]),
+    "x": ("attitude", lambda record: record["quaternion"][1]),
+    "y": ("attitude", lambda record: record["quaternion"][2]),
+    "z": ("attitude", lambda record: record["quaternion"][3]),
+}
+
+def lttb(points: list, threshold: int) -> list:
+    """
+    Largest-Triangle-Three-Buckets: threshold of the time-sorted [t, value] points, first & last always kept.
+    Each bucket keeps the point making the largest triangle with the last kept point and the next bucket's average.
+    """
+    count = len(points)
+    if threshold >= count or count <= 2:
+        return list(points)
+    if threshold < 3:
+        return [points[0], points[-1]][:max(threshold, 0)]
+
+    sampled = [points[0]]
+    every = (count - 2) / (threshold - 2)
+    kept = 0
+
+    for bucket in range(threshold - 2):
+        #average of the next bucket, the third corner of the triangle
+        average_start = int((bucket + 1) * every) + 1
+        average_end = min(int((bucket + 2) * every) + 1, count)
+        span = average_end - average_start
+        average_t = sum(point[0] for point in points[average_start:average_end]) / span
+        average_value = sum(point[1] for point in points[average_start:average_end]) / span
+
+        kept_t, kept_value = points[kept]
+        best, best_area = None, -1.0
+
+        for index in range(int(bucket * every) + 1, int((bucket + 1) * every) + 1):
+            t, value = points[index]
+            area = abs((kept_t - average_t) * (value - kept_value) - (kept_t - t) * (average_value - kept_value))
+            if area > best_area:
+                best, best_area = index, area
+
+        sampled.append(points[best])
+        kept = best
+
+    sampled.append(points[-1])
+    return sampled
+
+class TimeSeries:
+    def __init__(self, reader, capacity: int = 256):
+        self.reader = reader #recorder.TelemetryReader
+        self.capacity = capacity #cached results, least recently used evicted first
+
+        self.cache = OrderedDict() #(channel, start, end, points, address) -> [[t, value], ...]
+        self.generations = {} #(kind, address) -> invalidations so far, address None counts every vehicle's
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, channel: str, start: float = None, end: float = None, points: int = 500, address: int = None):
+        """
+        [[t, value], ...] of channel between start & end (None: unbounded) from the vehicle at address (None: any),
+        at most points long, None for an unknown channel
+        """
+        if channel not in CHANNELS:
+            return None
+
+        key = (channel, start, end, points, address)
+        kind, value_of = CHANNELS[channel]
+
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return self.cache[key]
+            generation = self.generations.get((kind, address), 0)
+
+        raw = []
+        for record in self.reader.range(start, end, [kind], address):
+            value = value_of(record)
+            if value is not None:
+                raw.append([record["time"], value])
+
+        raw.sort(key=lambda point: point[0]) #arrival order, recovered & late frames are a little out of place
+        result = lttb(raw, points)
+
+        with self.lock:
+            self.misses += 1
+            if self.generations.get((kind, address), 0) == generation: #else a packet landed mid-read, may be stale
+                self.cache[key] = result
+                if len(self.cache) > self.capacity:
+                    self.cache.popitem(last=False)
+
+        return result
+
+    def invalidate(self, kind: str, mission_time: float, address: int = None):
+        """
+        Evicts the cached results a new record of kind at mission_time, from the vehicle at address, belongs in
+        """
+        with self.lock:
+            for generation in ((kind, address), (kind, None)):
+                self.generations[generation] = self.generations.get(generation, 0) + 1
+
+            stale = [
+                key for key in self.cache
+                if CHANNELS[key[0]][0] == kind
+                and (key[1] is None or key[1] <= mission_time)
+                and (key[2] is None or mission_time <= key[2])
+                and (key[4] is None or key[4] == address)
+            ]
+            for key in stale:
+                del self.cache[key]
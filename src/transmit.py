@@ -1,4 +1,5 @@
-from reyax import RYLR998, getPackFormat, getStartMessage, quaternion_to_short, time_delta_to_short
+from reyax import RYLR998, getPackFormat, getRedundancy, quaternion_to_short, quaternion_to_byte, mission_time_to_uint, decode_control, check_control, encode_ack, encode_altitude, encode_health, encode_event, FRAME_ATTITUDE, next_sequence
+from collections import deque
 import struct, time
 
 class RYLR998_Transmit:
@@ -11,36 +12,95 @@ class RYLR998_Transmit:
         self.lora = RYLR998(uart_port, baud_rate, 1, address=1, network_id=1)
         self.ser = self.lora.ser # for more direct access to device
 
+        self.sequence = 0 #rolling frame counter so the ground can tell packet loss from a slow sender
+        self.previous = deque(maxlen=getRedundancy()) #(mission_time, quaternion) of the last frames sent, newest first
+        self.last_command_id = None #the ground retransmits until acked, don't run the same command twice
+        self.last_status = None #what it was acked with, retransmissions get the same answer
+
     def wait_for_start_message(self) -> float:
         print("WAITING FOR START COMMAND FROM BASE CONTROL...", flush=True)
         while True: #blocks data collection execution in outer scope
-            received_data = self.read_data()
-            
-            if received_data and getStartMessage() in received_data: #start message here soley to lessen error potential in comms
-                #DECODE and return to Flask scope
+            command = self.read_command()
+
+            if command and command[0] == "start":
                 print("RECIEVED, ENTERING DATA COLLECTION AND TRANSMISSION...", flush=True)
-                pressure = received_data.split("|")[1] #float of pressure
+                return command[1] #sea level pressure, already a float
 
-                return float(pressure) 
+    def read_command(self, block: bool = True):
+        """
+        Next control message from the ground as (command, argument), checked (see reyax.check_control) and acked
+        with the result as soon as it's read, argument parsed. Rejected ones and retransmissions of the last command
+        are acked (again) but not returned.
 
-    def read_data(self):
+        block: wait for one (readline blocks on the port for up to its timeout, no spinning),
+               False only looks at what's already buffered and returns None if there's nothing
         """
-        Read a line of data.
+        while block or self.lora.has_input():
+            line = self.lora.read_line(None if block else 0)
+            fields = line.split(b",", 2)
+
+            if len(fields) < 3 or not fields[0].startswith(b"+RCV="):
+                continue
+
+            control = decode_control(fields[2].rsplit(b",", 2)[0].decode(errors="replace")) #<Data> block
+            if control is None:
+                continue
+
+            command_id, command, argument = control
+
+            if command_id == self.last_command_id:
+                self.acknowledge(command_id, self.last_status)
+                continue
+
+            status, argument = check_control(command, argument)
+            self.acknowledge(command_id, status)
+            self.last_command_id, self.last_status = command_id, status
+
+            if status == "rejected":
+                print(f"Rejected {command} command ({control[2]})", flush=True)
+                continue
+
+            return command, argument
+
+        return None
+
+    def acknowledge(self, command_id: int, status: str = "ok"):
+        ack = encode_ack(command_id, status).encode()
+        try:
+            self.lora.send_data(data = ack, dataSize = len(ack))
+        except RuntimeError as e: #the ground resends, we'll ack the next one
+            print(f"Failed to ack command {command_id}: {e}", flush=True)
+
+    def send(self, mission_time, data_points: list) -> bool:
+        bytestr = self.encode(mission_time, data_points)
+        self.sequence = next_sequence(self.sequence) #never 0x0A/0x0D
+
+        if self.previous.maxlen:
+            self.previous.appendleft((mission_time, data_points[-1] if type(data_points[0]) == list else data_points))
+
+        return self.lora.send_data(data = bytestr, dataSize = len(bytestr))
+
+    def send_frame(self, kind: str, payload):
         """
-        while True:
-            if self.ser.in_waiting:
-                response = self.ser.readline().decode().strip()
-                if response and "," in response:
-                    try:
-                        return response.split(",")[2] #TODO check if always <data> block
-                    except: #has never happened in testing, but will circumvent in case it ever happens 
-                        continue        
-
-    def send(self, time_delta, data_points: list) -> bool:
-        bytestr = self.encode(time_delta, data_points)
-        return self.lora.send_data(data = bytestr, dataSize = struct.calcsize(getPackFormat()))
-
-    def encode(self, time_delta: int, data_points: list) -> bytes:
+        Sends one frame a downlink.DownlinkScheduler picked, payload as pushed:
+            attitude (mission_time, quaternion)
+            altitude (mission_time, altitude, velocity, acceleration)
+            health   (mission_time, health dict, see reyax.encode_health)
+            event    events.FlightEventDetector event
+        """
+        if kind == "attitude":
+            return self.send(*payload)
+
+        if kind == "altitude":
+            bytestr = encode_altitude(*payload)
+        elif kind == "health":
+            bytestr = encode_health(*payload)
+        else:
+            bytestr = encode_event(payload)
+
+        return self.lora.send_data(data = bytestr, dataSize = len(bytestr))
+
+    def encode(self, mission_time: float, data_points: list) -> bytes:
         """
         Through calculations we expect len(datapoints) == 9, although there are ONLY 8 data points
         
@@ -48,7 +108,7 @@ class RYLR998_Transmit:
             dp0, dp1, ... dp11,
         ]
         
-        time_delta: estimated time between quaternions in seconds
+        mission_time: seconds since the start signal when the sample was taken
 
         Param dp: will have...
         (
@@ -61,13 +121,16 @@ class RYLR998_Transmit:
         REWRITE DATA TO INTEGERS FOR SENDING | DIVIDE EQUALLY FOR RECIEVING
 
         [
-            time_stamp:16bit, 
+            frame_type:8bit (FRAME_ATTITUDE),
+            sequence:8bit,
+            mission_time_ms:32bit, 
             (w:16bit, x:16bit, y:16bit, z:16bit), 
             (w2:16bit, x2:16bit, y2:16bit, z2:16bit), 
             (w3:16bit, x3:16bit, y3:16bit, z3:16bit), 
             (w4:16bit, x4:16bit, y4:16bit, z4:16bit),
             ...
-            (w8:16bit, x8:16bit, y8:16bit, z8:16bit)
+            (w8:16bit, x8:16bit, y8:16bit, z8:16bit),
+            (offset_ms:16bit, w:8bit, x:8bit, y:8bit, z:8bit) * up to getRedundancy(), previous frames newest first
         ]
         """
 
@@ -80,6 +143,12 @@ class RYLR998_Transmit:
         else: #singular quaternion
             encodable_array.extend(quaternion_to_short(*data_points))
 
-        payload = struct.pack(getPackFormat(), time_delta_to_short(time_delta), *encodable_array)
+        #redundant copies of the previous frames, so the ground can backfill any of them that were lost
+        for previous_time, previous_quaternion in self.previous:
+            offset = int(round((mission_time - previous_time) * 1000))
+            encodable_array.append(max(0, min(65535, offset)))
+            encodable_array.extend(quaternion_to_byte(*previous_quaternion))
+
+        payload = struct.pack(getPackFormat(len(self.previous)), FRAME_ATTITUDE, self.sequence, mission_time_to_uint(mission_time), *encodable_array)
 
         return payload
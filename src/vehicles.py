@@ -0,0 +1,98 @@
+"""
+Per-transmitter state on the ground station, so one receiver can track several rockets (or payload sections)
+without one's packets running through another's interpolator, history or link stats.
+
+Packets are demultiplexed by the <Address> of the +RCV line (link["address"], see reyax.parse_link_fields),
+each vehicle's dashboard traffic goes to its own fanout room (see broadcast.ClientFanout).
+
+    vehicles = VehicleRegistry(lambda: Interpolate(FPS, TIMELINE_METHOD))
+    vehicle = vehicles.get(data[-1]["address"]) #created the first time the address is heard
+    fanout.publish("data_batch", frames, room=vehicle.room)
+"""
+
+import threading
+
+from history import TelemetryHistory
+from linkstats import LinkStats
+
+DEFAULT_VEHICLE = 1 #the RPI02W's address, dashboards start out watching it
+MAX_ADDRESS = 65535 #RYLR998 AT+ADDRESS range is 0-65535
+
+def vehicle_room(address: int) -> str:
+    return f"vehicle-{address}"
+
+def parse_address(value, default: int = DEFAULT_VEHICLE):
+    """
+    Sender address a client asked for, default when it didn't say, None if it isn't a valid address
+    """
+    if value is None:
+        return default
+
+    try:
+        address = int(value)
+    except (TypeError, ValueError):
+        return None
+
+    return address if 0 <= address <= MAX_ADDRESS else None
+
+class Vehicle:
+    def __init__(self, address: int, interpolator):
+        self.address = address
+        self.room = vehicle_room(address)
+
+        self.interpolator = interpolator
+        self.history = TelemetryHistory() #every received packet at its stream time, for late-joining dashboards
+        self.link_stats = LinkStats() #packet loss, jitter, RSSI/SNR & corrupt frames
+        self.flight_events = [] #launch, burnout, apogee, landing as reported by this vehicle, de-duplicated
+        self.latest_frames = {} #newest "altitude" & "health" frame, replayed to (re)connecting dashboards
+
+        self.last_link_push = 0.0 #perf_counter of the last "link_stats" push
+        self.last_mission_time = None #legacy "frames" mode still interpolates on deltas
+        self.clock_offset = None #"timeline" mode, local clock - this vehicle's stream clock
+        self.epoch = 0 #link["epoch"] of its packets, bumped when the sender restarts
+
+class VehicleRegistry:
+    def __init__(self, make_interpolator):
+        self.make_interpolator = make_interpolator #each vehicle gets a fresh one
+        self.vehicles = {} #address -> Vehicle
+        self.lock = threading.Lock()
+
+    def get(self, address) -> Vehicle:
+        """
+        The vehicle at address, created on first sight. A packet whose address couldn't be read counts as DEFAULT_VEHICLE's.
+        Only for received packets, client-supplied addresses go through find.
+        """
+        if address is None:
+            address = DEFAULT_VEHICLE
+
+        with self.lock:
+            if address not in self.vehicles:
+                self.vehicles[address] = Vehicle(address, self.make_interpolator())
+            return self.vehicles[address]
+
+    def find(self, address):
+        """
+        The vehicle at address if it's been heard from, None otherwise (never creates one)
+        """
+        if address is None:
+            address = DEFAULT_VEHICLE
+
+        with self.lock:
+            return self.vehicles.get(address)
+
+    def restart(self, vehicle: Vehicle, epoch: int):
+        """
+        The sender rebooted: nothing gets interpolated across the gap, the next packet starts a fresh timeline
+        """
+        vehicle.interpolator = self.make_interpolator()
+        vehicle.last_mission_time = None
+        vehicle.clock_offset = None
+        vehicle.epoch = epoch
+
+    def addresses(self) -> list:
+        with self.lock:
+            return sorted(self.vehicles)
+
+    def all(self) -> list:
+        with self.lock:
+            return list(self.vehicles.values())
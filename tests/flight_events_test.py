@@ -0,0 +1,92 @@
+"""
+Simulated flight through events.FlightEventDetector: pad, boost, coast, parachute descent and touchdown,
+with the barometer sampled & held at its own rate and gaussian altitude noise. Checks every event fires
+once and near the moment it happened, at several noise levels.
+
+run from the repo root: python tests/flight_events_test.py
+"""
+import os, sys, random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from events import FlightEventDetector
+from launch import LaunchDetector
+
+G = 9.81
+SAMPLE_RATE = 100.0 #Hz, sampling loop
+BAROMETER_RATE = 20.0 #Hz, altimeter thread
+
+PAD = 5.0 #seconds before ignition
+BURN = 3.0
+BOOST_ACCELERATION = 50.0 #m/s^2 of linear acceleration while the motor burns
+DRAG = 0.002 #1/m, deceleration = DRAG * v^2 while coasting
+DESCENT_RATE = 6.0 #m/s under parachute
+GROUND = 60.0 #seconds on the ground after touchdown
+
+def simulate(noise: float, seed: int = 0) -> dict:
+    """
+    Runs one flight, returns {"events": {name: time}, "truth": {name: time}}
+    """
+    random.seed(seed)
+    detector = FlightEventDetector(LaunchDetector(25.0, 0.05, 15.0))
+
+    dt = 1.0 / SAMPLE_RATE
+    t, altitude, velocity = 0.0, 0.0, 0.0
+    truth = {"launch": PAD, "burnout": PAD + BURN}
+    barometer, next_barometer = 0.0, 0.0
+    events = {}
+    landed_at = None
+
+    while landed_at is None or t < landed_at + GROUND:
+        #true state
+        if t < PAD:
+            linear = 0.0
+        elif t < PAD + BURN:
+            linear = BOOST_ACCELERATION
+        elif "apogee" not in truth:
+            linear = -DRAG * velocity * abs(velocity) #accelerometer sees drag only, gravity is removed
+        else:
+            linear = 0.0
+
+        if t >= PAD and landed_at is None:
+            if "apogee" in truth: #under parachute
+                velocity = -DESCENT_RATE
+            else:
+                velocity += (linear - G) * dt
+                if velocity <= 0:
+                    truth["apogee"] = t
+            altitude = max(0.0, altitude + velocity * dt)
+
+            if "apogee" in truth and altitude == 0.0:
+                landed_at = truth["landing"] = t
+
+        #sample & hold barometer
+        if t >= next_barometer:
+            barometer = round(altitude + random.gauss(0.0, noise), 2)
+            next_barometer += 1.0 / BAROMETER_RATE
+
+        sensed = [random.gauss(0.0, 0.2), random.gauss(0.0, 0.2), linear + random.gauss(0.0, 0.2)]
+        for event in detector.update(t, sensed, [0.0, 0.0, G], barometer):
+            assert event["event"] not in events, f"{event['event']} fired twice"
+            events[event["event"]] = event["time"]
+
+        t += dt
+
+    return {"events": events, "truth": truth}
+
+if __name__ == "__main__":
+    #how far each event may be stamped from when it really happened (s); apogee waits on apogee_drop of fall
+    tolerance = {"launch": 0.2, "burnout": 0.3, "apogee": 1.0, "landing": 1.5}
+
+    for noise in (0.0, 0.05, 0.1, 0.3):
+        result = simulate(noise)
+        events, truth = result["events"], result["truth"]
+
+        print(f"noise {noise:4.2f} m: " + " | ".join(
+            f"{name} {events.get(name, float('nan')):7.2f} s (true {truth[name]:7.2f} s)" for name in tolerance
+        ))
+
+        for name, allowed in tolerance.items():
+            assert name in events, f"{name} never fired at {noise} m of noise"
+            assert abs(events[name] - truth[name]) <= allowed, f"{name} at {events[name]:.2f} s, happened at {truth[name]:.2f} s"
+
+    print("all events detected")
@@ -0,0 +1,58 @@
+"""
+SLERP vs SQUAD on recorded flight-computer quaternions (quaternion_test_data/)
+
+Every other recorded sample is treated as a received packet, the samples in between are held out and
+reconstructed by each method; error is the angle between the reconstruction and the held out sample.
+
+run from the repo root: python tests/interpolation_bench.py
+"""
+import os, sys, glob, json, time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from interpolation import Interpolate
+import quaternion_batch as qb
+
+def load_quaternions() -> list:
+    quaternions = []
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "quaternion_test_data", "*.txt"))):
+        with open(path) as f:
+            quaternions.extend(json.loads(line) for line in f if line.strip())
+    return quaternions
+
+def as_dict(q: list) -> dict:
+    return {"rotation_w": float(q[0]), "rotation_x": float(q[1]), "rotation_y": float(q[2]), "rotation_z": float(q[3])}
+
+def angular_error(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.degrees(qb.angular_distance(a, b))
+
+def run(method: str, packets: list, held_out_times: np.ndarray):
+    interpolator = Interpolate(method=method)
+
+    start = time.perf_counter()
+    for i, q in enumerate(packets):
+        interpolator.add_sample(float(i), as_dict(q))
+    add_cost = (time.perf_counter() - start) / len(packets)
+
+    start = time.perf_counter()
+    if method == "squad":
+        frames = interpolator.timeline.evaluate(held_out_times) #one vectorized batch
+    else:
+        frames = np.array([interpolator.sample(t) for t in held_out_times])
+    eval_cost = (time.perf_counter() - start) / len(held_out_times)
+
+    return frames, add_cost, eval_cost
+
+if __name__ == "__main__":
+    #first line is the identity before the fusion fix, also drop corrupt lines (components outside [-1, 1])
+    quaternions = [q for q in load_quaternions() if np.linalg.norm(q) > 0.5 and max(map(abs, q)) <= 1][1:]
+    packets = quaternions[::2]
+    held_out = np.array(quaternions[1::2][:len(packets) - 1])
+    held_out_times = np.arange(len(held_out)) + 0.5 #halfway between packets
+
+    print(f"{len(packets)} packets, {len(held_out)} held out samples")
+    for method in ("slerp", "squad"):
+        frames, add_cost, eval_cost = run(method, packets, held_out_times)
+        error = angular_error(frames, held_out)
+        print(f"{method:>6}: mean err {error.mean():6.3f} deg | median err {np.median(error):6.3f} deg | max err {error.max():7.3f} deg | "
+              f"add {add_cost * 1e6:7.1f} us/packet | eval {eval_cost * 1e6:7.1f} us/frame")
@@ -0,0 +1,25 @@
+"""
+Per-sample cost of zeroing a quaternion in the flight loop:
+quaternion_relative(*reference, *current) vs a ReferenceFrame built once after the start signal
+
+run from the repo root: python tests/quaternion_bench.py
+"""
+import os, sys, timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from quaternion import quaternion_relative, ReferenceFrame
+
+reference = (0.0838623046875, 0.323486328125, 0.9425048828125, 0.00042724609375)
+current = (-0.14654541015625, 0.28955078125, 0.84747314453125, -0.4039306640625) #tuple, like BNO055.quaternion
+
+if __name__ == "__main__":
+    frame = ReferenceFrame(reference)
+    assert all(abs(a - b) < 1e-12 for a, b in zip(frame.relative(current), quaternion_relative(*reference, *current)))
+
+    number = 200000
+    for name, statement in (
+        ("quaternion_relative", lambda: quaternion_relative(*reference, *list(current))),
+        ("ReferenceFrame.relative", lambda: frame.relative(current)),
+    ):
+        best = min(timeit.repeat(statement, number=number, repeat=5)) / number
+        print(f"{name:>24}: {best * 1e9:7.1f} ns/sample")
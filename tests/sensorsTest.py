@@ -8,41 +8,15 @@ import board, adafruit_bno055
 
 from altimeter import MS5611
 
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")) #local copies in tests/ win
+from quaternion import quaternion_to_euler
+
 def get_angle_representation(w, x, y, z):
     """
-    Converts quaternion (w, x, y, z) to Euler angles (roll, pitch, yaw) with full 360° coverage.
-    
-    Parameters:
-        w, x, y, z: float
-            The quaternion components.
-    
-    Returns:
-        tuple: (roll, pitch, yaw) in radians, all normalized to the range [-pi, pi].
+    Converts quaternion (w, x, y, z) to Euler angles (roll, pitch, yaw) in radians, all in the range [-pi, pi].
     """
-    # Define normalize_angle as a lambda function to wrap angles to [-pi, pi]
-    normalize_angle = lambda angle: ((angle + math.pi) % (2 * math.pi)) - math.pi
-
-    # Roll (x-axis rotation)
-    t0 = +2.0 * (w * x + y * z)
-    t1 = +1.0 - 2.0 * (x * x + y * y)
-    roll = math.atan2(t0, t1)
-
-    # Pitch (y-axis rotation)
-    t2 = +2.0 * (w * y - z * x)
-    t2 = max(-1.0, min(1.0, t2))  # Clamp to avoid out-of-bound errors with asin
-    pitch = math.asin(t2)
-
-    # Yaw (z-axis rotation)
-    t3 = +2.0 * (w * z + x * y)
-    t4 = +1.0 - 2.0 * (y * y + z * z)
-    yaw = math.atan2(t3, t4)
-
-    # Normalize roll, pitch, and yaw to the range [-pi, pi]
-    roll = normalize_angle(roll)
-    pitch = normalize_angle(pitch)
-    yaw = normalize_angle(yaw)
-
-    return roll, pitch, yaw
+    return quaternion_to_euler(w, x, y, z)
 
 class FlightDataLogger:
     """Class to collect and log flight data from sensors."""
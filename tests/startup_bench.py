@@ -0,0 +1,73 @@
+"""
+Boot-to-armed cost on the flight computer: import time of every module RPI02W.py pulls in,
+each measured in a fresh interpreter so nothing is already cached, and (with --hardware) the
+per-device bring-up report of FlightDataLogger.setup_hardware
+
+run from the repo root: python tests/startup_bench.py [--hardware]
+"""
+import os, subprocess, sys, tempfile
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+#what the logger process needs before it's armed, heaviest third-party drivers first
+MODULES = [
+    "board",
+    "adafruit_bno055",
+    "RPi.GPIO",
+    "serial",
+    "numpy", #should no longer be on the flight computer's path at all, listed for comparison
+    "multiprocessing",
+    "altimeter",
+    "transmit",
+    "camera",
+    "RPI02W",
+]
+
+MEASURE = """
+import sys, time
+sys.path.insert(0, {src!r})
+start = time.perf_counter()
+try:
+    import {module}
+except Exception as e:
+    print(f"unavailable ({{type(e).__name__}})")
+else:
+    print(f"{{(time.perf_counter() - start) * 1000:.1f}}")
+    print(" ".join(sorted(name for name in ("numpy", "board", "adafruit_bno055", "serial") if name in sys.modules)))
+"""
+
+def import_time(module: str, repeat: int = 3):
+    """
+    Best of repeat cold imports in ms & the heavy modules it dragged in, (None, reason) if it can't be imported here
+    """
+    best, dragged = None, ""
+    for _ in range(repeat):
+        #cwd: RPI02W logs to ./src.log on import
+        process = subprocess.run([sys.executable, "-c", MEASURE.format(src=SRC, module=module)], capture_output=True, text=True, cwd=tempfile.gettempdir())
+        output = process.stdout.splitlines()
+
+        if not output or output[0].startswith("unavailable"):
+            return None, output[0] if output else "no output"
+
+        elapsed = float(output[0])
+        best = elapsed if best is None else min(best, elapsed)
+        dragged = output[1] if len(output) > 1 else ""
+
+    return best, dragged
+
+if __name__ == "__main__":
+    print(f"{'module':>16}  {'import':>10}  pulls in")
+    for module in MODULES:
+        elapsed, detail = import_time(module)
+        if elapsed is None:
+            print(f"{module:>16}  {'-':>10}  {detail}")
+        else:
+            print(f"{module:>16}  {elapsed:7.1f} ms  {detail}")
+
+    if "--hardware" in sys.argv: #only on the flight computer itself
+        sys.path.insert(0, SRC)
+        from RPI02W import FlightDataLogger
+
+        logger = FlightDataLogger() #logs the bring-up summary as it comes up
+        for name, device in logger.hardware_report.items():
+            print(name, device)
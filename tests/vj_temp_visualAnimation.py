@@ -35,19 +35,9 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 
-# Function to convert quaternion to rotation matrix
-def quaternion_to_rotation_matrix(q):
-    """
-    Convert a quaternion to a 3x3 rotation matrix.
-    :param q: Quaternion [w, x, y, z]
-    :return: 3x3 rotation matrix
-    """
-    w, x, y, z = q
-    return np.array([
-        [1 - 2 * (y**2 + z**2), 2 * (x * y - z * w), 2 * (x * z + y * w)],
-        [2 * (x * y + z * w), 1 - 2 * (x**2 + z**2), 2 * (y * z - x * w)],
-        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x**2 + y**2)]
-    ])
+import os, sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+import quaternion_batch as qb
 
 # Function to animate 3D rotation
 def animate_rotation(quaternions, interval=100):
@@ -86,10 +76,12 @@ def animate_rotation(quaternions, interval=100):
     for vec, color in zip(static_vectors, colors):
         ax.plot(*vec, color=color, lw=2, alpha=0.6, linestyle="dashed")
 
+    # Rotate the vector by every quaternion up front
+    rotated_vectors = qb.rotate_vectors(qb.normalize(quaternions), vector)
+
     # Animation function
     def update(frame):
-        rotation_matrix = quaternion_to_rotation_matrix(quaternions[frame])
-        rotated_vector = rotation_matrix @ vector
+        rotated_vector = rotated_vectors[frame]
         arrow.set_data([0, rotated_vector[0]], [0, rotated_vector[1]])
         arrow.set_3d_properties([0, rotated_vector[2]])
         return arrow,